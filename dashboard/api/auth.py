@@ -9,14 +9,17 @@ Gerencia:
 """
 
 import base64
-import json
 import os
+import threading
 import time
-import webbrowser
-from urllib.parse import urlencode, urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlencode
 
 import requests
 
+from dashboard.utils.file_utils import atomic_write
+from dashboard.utils.json_utils import dumps, loads
 from dashboard.config import (
     CLIENT_ID,
     CLIENT_SECRET,
@@ -32,6 +35,15 @@ from dashboard.config import (
 )
 
 
+# Cache de tokens do processo, compartilhado entre instâncias/threads:
+# client_id → (access_token, refresh_token, expires_at)
+_TOKEN_CACHE: dict[str, tuple[str, str | None, float]] = {}
+_TOKEN_LOCK = threading.Lock()
+
+# Escrita do token.json fora do caminho crítico (um único worker preserva a ordem)
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-io")
+
+
 def _get_cached_token() -> dict | None:
     """Recupera token do st.session_state (sobrevive reruns no Cloud)."""
     try:
@@ -51,6 +63,19 @@ def _set_cached_token(token_data: dict):
 
 
 class ContaAzulAuth:
+    __slots__ = (
+        "client_id",
+        "client_secret",
+        "redirect_uri",
+        "_basic_auth",
+        "access_token",
+        "refresh_token",
+        "_expires_at",
+        "_valid_until_mono",
+        "_refresh_timer",
+        "_refresh_lock",
+    )
+
     def __init__(
         self,
         client_id: str = None,
@@ -67,13 +92,24 @@ class ContaAzulAuth:
                 "Defina CONTA_AZUL_CLIENT_ID e CONTA_AZUL_CLIENT_SECRET no .env ou st.secrets"
             )
 
+        # Credenciais são imutáveis: codifica o header Basic uma única vez
+        credentials = f"{self.client_id}:{self.client_secret}"
+        self._basic_auth = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+
         self.access_token: str | None = None
         self.refresh_token: str | None = None
         self.expires_at: float = 0
+        self._refresh_timer: threading.Timer | None = None
+        # Serializa renovações (fan-out de requisições, timer em background)
+        self._refresh_lock = threading.RLock()
 
-        # Prioridade: session_state > token.json > secrets
+        # Prioridade: cache do processo > session_state > token.json > secrets
+        with _TOKEN_LOCK:
+            shared = _TOKEN_CACHE.get(self.client_id)
         cached = _get_cached_token()
-        if cached:
+        if shared:
+            self.access_token, self.refresh_token, self.expires_at = shared
+        elif cached:
             self.access_token = cached.get("access_token")
             self.refresh_token = cached.get("refresh_token")
             self.expires_at = cached.get("expires_at", 0)
@@ -90,36 +126,82 @@ class ContaAzulAuth:
     # ─── Header de autenticação Basic ───
 
     def _basic_auth_header(self) -> str:
-        credentials = f"{self.client_id}:{self.client_secret}"
-        encoded = base64.b64encode(credentials.encode()).decode()
-        return f"Basic {encoded}"
+        return self._basic_auth
+
+    # ─── Expiração ───
+
+    @property
+    def expires_at(self) -> float:
+        """Expiração em epoch (persistida em token.json / session_state)."""
+        return self._expires_at
+
+    @expires_at.setter
+    def expires_at(self, value: float):
+        self._expires_at = value
+        # Prazo equivalente no relógio monotônico (imune a ajustes do wall-clock)
+        self._valid_until_mono = time.monotonic() + (value - time.time())
 
     # ─── Obter token válido (entry point principal) ───
 
     def get_access_token(self) -> str:
         """Retorna access_token válido, renovando automaticamente se necessário."""
-        # Token em memória ainda válido
-        if self.access_token and time.time() < self.expires_at:
-            return self.access_token
-
-        # Tem refresh_token em memória → renova
-        if self.refresh_token:
-            self._refresh()
-            return self.access_token
-
-        # Tenta carregar do arquivo
-        if self._load_token():
-            if time.time() < self.expires_at:
+        # Hot path: token em memória ainda válido
+        token = self.access_token
+        if token and time.monotonic() < self._valid_until_mono:
+            return token
+        return self._get_access_token_slow()
+
+    def _get_access_token_slow(self) -> str:
+        with self._refresh_lock:
+            # Outra thread renovou enquanto esperava o lock
+            token = self.access_token
+            if token and time.monotonic() < self._valid_until_mono:
+                return token
+
+            # Outra instância já renovou → reaproveita
+            with _TOKEN_LOCK:
+                shared = _TOKEN_CACHE.get(self.client_id)
+            if shared and time.time() < shared[2]:
+                self.access_token, self.refresh_token, self.expires_at = shared
                 return self.access_token
+
+            # Tem refresh_token em memória → renova
             if self.refresh_token:
                 self._refresh()
                 return self.access_token
 
+            # Tenta carregar do arquivo
+            if self._load_token():
+                if time.monotonic() < self._valid_until_mono:
+                    return self.access_token
+                if self.refresh_token:
+                    self._refresh()
+                    return self.access_token
+
         raise ValueError(
             "Nenhum token disponível. Execute o fluxo de autorização primeiro:\n"
             "  python -m dashboard.api.auth"
         )
 
+    def invalidate(self):
+        """Descarta o access_token atual (ex.: após 401 da API)."""
+        self.access_token = None
+        self.expires_at = 0
+        with _TOKEN_LOCK:
+            _TOKEN_CACHE.pop(self.client_id, None)
+
+    def renew_rejected(self, stale_token: str):
+        """
+        Renova após 401 obtido com `stale_token` (descarte + refresh sob o lock).
+
+        Se outra thread já trocou o token, só o reaproveita: um 401 tardio
+        não descarta um token recém-renovado nem dispara outro refresh.
+        """
+        with self._refresh_lock:
+            if self.access_token == stale_token:
+                self.invalidate()
+            self._refresh(stale_token)
+
     # ─── Fluxos OAuth2 ───
 
     def get_authorization_url(self) -> str:
@@ -146,31 +228,71 @@ class ContaAzulAuth:
         }
         response = requests.post(TOKEN_URL, headers=headers, data=data)
         response.raise_for_status()
-        token_data = response.json()
+        token_data = loads(response.content)
         self._save_token(token_data)
         return token_data
 
-    def _refresh(self):
-        """Renova o access_token usando o refresh_token."""
-        if not self.refresh_token:
-            raise ValueError("Nenhum refresh_token disponível.")
-
-        headers = {
-            "Authorization": self._basic_auth_header(),
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-        data = {
-            "grant_type": "refresh_token",
-            "refresh_token": self.refresh_token,
-        }
-        response = requests.post(TOKEN_URL, headers=headers, data=data)
-        if not response.ok:
-            error_detail = response.text[:500]
-            raise RuntimeError(
-                f"Falha ao renovar token ({response.status_code}): {error_detail}"
-            )
-        token_data = response.json()
-        self._save_token(token_data)
+    def _refresh(self, stale_token: Optional[str] = None):
+        """
+        Renova o access_token usando o refresh_token (uma thread por vez).
+
+        Com `stale_token` (o token recusado), não renova se o access_token
+        atual já é outro e ainda válido: outra thread renovou primeiro.
+        """
+        with self._refresh_lock:
+            if (
+                stale_token is not None
+                and self.access_token
+                and self.access_token != stale_token
+                and time.monotonic() < self._valid_until_mono
+            ):
+                return
+
+            if not self.refresh_token:
+                raise ValueError("Nenhum refresh_token disponível.")
+
+            headers = {
+                "Authorization": self._basic_auth_header(),
+                "Content-Type": "application/x-www-form-urlencoded",
+            }
+            data = {
+                "grant_type": "refresh_token",
+                "refresh_token": self.refresh_token,
+            }
+            response = requests.post(TOKEN_URL, headers=headers, data=data)
+            if not response.ok:
+                error_detail = response.text[:500]
+                raise RuntimeError(
+                    f"Falha ao renovar token ({response.status_code}): {error_detail}"
+                )
+            token_data = loads(response.content)
+            self._save_token(token_data)
+
+    # ─── Renovação antecipada (background) ───
+
+    def _schedule_refresh(self, expires_in: float):
+        """Agenda renovação 120s antes da expiração, fora do caminho das requisições."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(
+            max(expires_in - 120, 10), self._background_refresh
+        )
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        # Outra instância já renovou → só adota o token compartilhado
+        with _TOKEN_LOCK:
+            shared = _TOKEN_CACHE.get(self.client_id)
+        if shared and shared[2] > self.expires_at:
+            self.access_token, self.refresh_token, self.expires_at = shared
+            self._schedule_refresh(self.expires_at + 60 - time.time())
+            return
+        try:
+            self._refresh()
+        except Exception:
+            # Falhou em background: o próximo get_access_token renova síncrono
+            pass
 
     # ─── Persistência ───
 
@@ -179,6 +301,8 @@ class ContaAzulAuth:
         self.refresh_token = token_data.get("refresh_token", self.refresh_token)
         expires_in = token_data.get("expires_in", 3600)
         self.expires_at = time.time() + expires_in - 60  # margem de 60s
+        if self.refresh_token:
+            self._schedule_refresh(expires_in)
 
         token_cache = {
             "access_token": self.access_token,
@@ -186,22 +310,23 @@ class ContaAzulAuth:
             "expires_at": self.expires_at,
         }
 
+        # Compartilha com as demais instâncias do processo
+        with _TOKEN_LOCK:
+            _TOKEN_CACHE[self.client_id] = (
+                self.access_token, self.refresh_token, self.expires_at,
+            )
+
         # Salva no session_state (Cloud — sobrevive reruns)
         _set_cached_token(token_cache)
 
-        # Salva no disco (local dev)
-        try:
-            with open(TOKEN_FILE, "w") as f:
-                json.dump(token_cache, f)
-        except OSError:
-            # No Cloud (read-only filesystem), salva apenas em memória
-            pass
+        # Salva no disco (local dev), em background
+        _IO_EXECUTOR.submit(atomic_write, TOKEN_FILE, dumps(token_cache))
 
     def _load_token(self) -> bool:
         if not os.path.exists(TOKEN_FILE):
             return False
-        with open(TOKEN_FILE) as f:
-            data = json.load(f)
+        with open(TOKEN_FILE, "rb") as f:
+            data = loads(f.read())
         self.access_token = data.get("access_token")
         self.refresh_token = data.get("refresh_token")
         self.expires_at = data.get("expires_at", 0)
@@ -210,6 +335,10 @@ class ContaAzulAuth:
     # ─── Fluxo interativo (CLI) ───
 
     def authorize_interactive(self) -> dict:
+        # Imports do fluxo CLI: não pesam no cold start do Streamlit
+        import webbrowser
+        from urllib.parse import urlparse, parse_qs
+
         auth_url = self.get_authorization_url()
         print("Abrindo navegador para autorização...")
         print(f"Se não abrir automaticamente, acesse:\n{auth_url}\n")
@@ -3,25 +3,38 @@ Cliente HTTP para a API Conta Azul v2.
 
 Responsabilidades:
 - Autenticação automática (Bearer token)
-- Rate limiting (100ms entre requests)
-- Retry com backoff exponencial
+- HTTP/2 com pool de conexões (httpx)
+- Rate limiting (token bucket de 10 req/s, seguro entre threads)
+- Retry com backoff exponencial (respeita Retry-After)
 - Paginação automática
 - Endpoints financeiros tipados
 """
 
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
-import requests
+import httpx
 
 from dashboard.api.auth import ContaAzulAuth
+from dashboard.api.rate_limiter import TokenBucket, backoff_delay, parse_rate_limit
+from dashboard.utils.json_utils import loads
 from dashboard.config import (
     API_BASE_URL,
-    MIN_REQUEST_INTERVAL,
+    RATE_LIMIT_PER_SECOND,
+    RATE_LIMIT_BURST,
     MAX_RETRIES,
     RETRY_BACKOFF,
+    RETRY_MAX_WAIT,
     LOOKBACK_DAYS,
+    MAX_WORKERS,
+    MAX_PAGES,
+    PAGE_SIZE,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
 )
+from dashboard.models.financial_models import AccountBalance
 
 
 class ContaAzulClient:
@@ -29,56 +42,80 @@ class ContaAzulClient:
 
     def __init__(self, auth: ContaAzulAuth = None):
         self.auth = auth or ContaAzulAuth()
-        self.session = requests.Session()
-        self._last_request_time = 0.0
+        self.session = httpx.Client(
+            http2=True,
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        self._rate_limiter = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+        self._cached_headers: dict | None = None
+        self._cached_until = 0.0
 
     # ─── HTTP primitivos ───
 
     def _get_headers(self) -> dict:
+        # Reaproveita os headers enquanto o token atual for válido
+        if self._cached_headers is not None and time.monotonic() < self._cached_until - 5:
+            return self._cached_headers
+
         token = self.auth.get_access_token()
-        return {
+        self._cached_headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
-
-    def _throttle(self):
-        elapsed = time.time() - self._last_request_time
-        if elapsed < MIN_REQUEST_INTERVAL:
-            time.sleep(MIN_REQUEST_INTERVAL - elapsed)
-        self._last_request_time = time.time()
+        # Expiração (epoch) convertida uma vez para o relógio monotônico
+        self._cached_until = time.monotonic() + (self.auth.expires_at - time.time())
+        return self._cached_headers
 
     def _request(self, method: str, path: str, **kwargs) -> dict | list | None:
         last_error = None
         for attempt in range(MAX_RETRIES):
-            self._throttle()
+            self._rate_limiter.acquire()
             try:
                 url = f"{API_BASE_URL}{path}"
-                resp = self.session.request(
-                    method, url, headers=self._get_headers(), **kwargs
-                )
+                headers = self._get_headers()
+                resp = self.session.request(method, url, headers=headers, **kwargs)
+                # Cota informada pelo servidor: desacelera antes do 429
+                self._rate_limiter.sync(*parse_rate_limit(resp.headers))
                 resp.raise_for_status()
-                if resp.status_code == 204 or not resp.content:
+                # Sem corpo (ou corpo descartado): não decodifica
+                if (
+                    resp.status_code == 204
+                    or method == "DELETE"
+                    or resp.headers.get("Content-Length") == "0"
+                    or not resp.content
+                ):
                     return None
-                return resp.json()
-            except requests.exceptions.HTTPError as e:
-                status = e.response.status_code if e.response is not None else 0
+                return loads(resp.content)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
                 # 401 → token expirou, tenta refresh
                 if status == 401 and attempt == 0:
+                    self._cached_until = 0.0
                     try:
-                        self.auth._refresh()
+                        # Token recusado: "Bearer <token>"
+                        self.auth.renew_rejected(headers["Authorization"][7:])
                         continue
                     except Exception:
                         pass
-                # 429 / 5xx → retry com backoff
+                # 429 / 5xx → retry (Retry-After ou backoff exponencial)
                 if status in (429, 500, 502, 503, 504):
                     last_error = e
-                    time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                    time.sleep(backoff_delay(
+                        attempt,
+                        RETRY_BACKOFF,
+                        e.response.headers.get("Retry-After"),
+                        max_delay=RETRY_MAX_WAIT,
+                    ))
                     continue
                 raise
-            except requests.exceptions.ConnectionError as e:
+            except httpx.TransportError as e:
                 last_error = e
-                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                time.sleep(backoff_delay(attempt, RETRY_BACKOFF, max_delay=RETRY_MAX_WAIT))
                 continue
 
         raise last_error
@@ -95,36 +132,60 @@ class ContaAzulClient:
         self,
         path: str,
         params: dict = None,
-        page_size: int = 50,
+        page_size: int = PAGE_SIZE,
     ) -> list:
-        """Busca todas as páginas de um endpoint paginado."""
+        """
+        Busca todas as páginas de um endpoint paginado.
+
+        A primeira página informa `itens_totais`; as demais são buscadas
+        em paralelo e concatenadas na ordem. Sem `itens_totais`, segue
+        página a página até uma página incompleta.
+        """
         params = dict(params or {})
         params["tamanho_pagina"] = page_size
-        all_items = []
-        page = 1
-
-        while True:
-            params["pagina"] = page
-            result = self.get(path, params=params)
-
-            if result is None:
-                break
-
-            # Suporta resposta paginada {itens, itens_totais} ou lista direta
-            if isinstance(result, dict):
-                items = result.get("itens", [])
-                total = result.get("itens_totais", 0)
-            elif isinstance(result, list):
-                items = result
-                total = len(items)
-            else:
-                break
-
-            all_items.extend(items)
-
-            if len(all_items) >= total or not items:
-                break
-            page += 1
+        params["pagina"] = 1
+        result = self.get(path, params=params)
+
+        # Suporta resposta paginada {itens, itens_totais} ou lista direta
+        if isinstance(result, list):
+            return result
+        if not isinstance(result, dict):
+            return []
+
+        def fetch_page(page: int) -> list:
+            page_result = self.get(path, params={**params, "pagina": page})
+            if isinstance(page_result, dict):
+                return page_result.get("itens", [])
+            if isinstance(page_result, list):
+                return page_result
+            return []
+
+        all_items = list(result.get("itens", []))
+        total = result.get("itens_totais")
+        if not all_items:
+            return all_items
+
+        # Usa o tamanho efetivo da página (a API pode limitar tamanho_pagina)
+        effective_size = len(all_items)
+
+        if total is None:
+            page, items = 1, all_items
+            while len(items) >= effective_size and page < MAX_PAGES:
+                page += 1
+                previous, items = items, fetch_page(page)
+                # Página vazia ou repetida (API ignorando `pagina`): fim
+                if not items or items[0] == previous[0]:
+                    break
+                all_items.extend(items)
+            return all_items
+
+        if effective_size >= total:
+            return all_items
+        n_pages = math.ceil(total / effective_size)
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, n_pages - 1)) as ex:
+            for items in ex.map(fetch_page, range(2, n_pages + 1)):
+                all_items.extend(items)
 
         return all_items
 
@@ -176,31 +237,39 @@ class ContaAzulClient:
         """Retorna todas as categorias financeiras."""
         return self.fetch_all_pages("/categorias")
 
+    def _safe_balance(self, account: dict) -> float:
+        """Saldo atual de uma conta; 0.0 em caso de erro."""
+        try:
+            bal = self.get_account_balance(account["id"])
+            return (bal or {}).get("saldo_atual", 0.0) or 0.0
+        except Exception:
+            return 0.0
+
     def get_cash_balance(self) -> dict:
         """
         Retorna posição de caixa consolidada:
-        {total, contas: [{nome, tipo, saldo, ativo}]}
+        {total, contas: [AccountBalance]}
+
+        Os saldos das contas ativas são buscados em paralelo.
         """
         accounts = self.get_cash_accounts()
+        active = [acc for acc in accounts if acc.get("ativo", True)]
         result = {"total": 0.0, "contas": []}
 
-        for acc in accounts:
-            if not acc.get("ativo", True):
-                continue
+        if not active:
+            return result
 
-            try:
-                bal = self.get_account_balance(acc["id"])
-                saldo = (bal or {}).get("saldo_atual", 0.0) or 0.0
-            except Exception:
-                saldo = 0.0
-
-            result["contas"].append({
-                "id": acc.get("id"),
-                "nome": acc.get("nome", "Conta sem nome"),
-                "tipo": acc.get("tipo", ""),
-                "banco": acc.get("banco", ""),
-                "saldo": saldo,
-            })
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(active))) as ex:
+            balances = list(ex.map(self._safe_balance, active))
+
+        for acc, saldo in zip(active, balances):
+            result["contas"].append(AccountBalance(
+                id=acc.get("id"),
+                nome=acc.get("nome", "Conta sem nome"),
+                tipo=acc.get("tipo", ""),
+                banco=acc.get("banco", ""),
+                saldo=saldo,
+            ))
             result["total"] += saldo
 
         return result
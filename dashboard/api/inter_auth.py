@@ -6,16 +6,27 @@ Gerencia:
 - Token OAuth2 via Client Credentials
 - Cache de token com auto-renovação (expira em 1h)
 - Suporte a certificado via arquivo ou base64 (Cloud)
+- Lock de arquivo na renovação (evita refresh duplo entre workers)
 """
 
+import atexit
 import base64
-import json
+import functools
 import os
 import tempfile
+import threading
 import time
+from contextlib import contextmanager
 
 import requests
 
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+from dashboard.utils.file_utils import atomic_write
+from dashboard.utils.json_utils import dumps, loads
 from dashboard.config import (
     INTER_CLIENT_ID,
     INTER_CLIENT_SECRET,
@@ -44,6 +55,7 @@ def _set_cached_token(token_data: dict):
         pass
 
 
+@functools.lru_cache(maxsize=8)
 def _resolve_cert_path(path: str | None) -> str | None:
     """Resolve caminho do certificado (absoluto ou relativo à raiz do projeto)."""
     if not path:
@@ -56,19 +68,54 @@ def _resolve_cert_path(path: str | None) -> str | None:
     return path
 
 
+@contextmanager
+def _file_lock(path: str):
+    """Lock exclusivo entre processos (flock); no-op se indisponível."""
+    try:
+        lock_file = open(path, "w") if fcntl else None
+    except OSError:
+        # Filesystem read-only (Cloud): segue sem lock
+        lock_file = None
+    if lock_file is None:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@functools.lru_cache(maxsize=None)
 def _decode_base64_cert(b64_content: str) -> str:
-    """Decodifica certificado base64 para arquivo temporário (para Streamlit Cloud)."""
+    """
+    Decodifica certificado base64 para arquivo temporário (para Streamlit Cloud).
+
+    O ssl da stdlib só carrega cert/key de cliente a partir de arquivo; o
+    arquivo é criado uma vez por processo (0600) e removido na saída.
+    """
     content = base64.b64decode(b64_content)
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pem")
-    tmp.write(content)
-    tmp.close()
+    with tmp:
+        os.chmod(tmp.name, 0o600)
+        tmp.write(content)
+    atexit.register(_remove_file, tmp.name)
     return tmp.name
 
 
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 class InterAuth:
     """Gerenciador de autenticação mTLS + OAuth2 para o Banco Inter."""
 
     TOKEN_FILE = os.path.join(str(PROJECT_ROOT), "inter_token.json")
+    LOCK_FILE = TOKEN_FILE + ".lock"
 
     def __init__(
         self,
@@ -109,6 +156,9 @@ class InterAuth:
 
         self.access_token: str | None = None
         self.expires_at: float = 0
+        self._listeners: list = []
+        # Serializa renovações entre threads do processo (reentrante: 401 → _request_token)
+        self._lock = threading.RLock()
 
         # Carregar token: session_state > arquivo
         cached = _get_cached_token()
@@ -118,21 +168,67 @@ class InterAuth:
         else:
             self._load_token()
 
+    @property
+    def expires_at(self) -> float:
+        """Expiração em epoch (persistida em inter_token.json / session_state)."""
+        return self._expires_at
+
+    @expires_at.setter
+    def expires_at(self, value: float):
+        self._expires_at = value
+        # Prazo equivalente no relógio monotônico (imune a ajustes do wall-clock)
+        self._valid_until_mono = time.monotonic() + (value - time.time())
+
+    def _token_valid(self) -> bool:
+        return bool(self.access_token) and time.monotonic() < self._valid_until_mono
+
     @property
     def cert(self) -> tuple[str, str]:
         """Par (cert, key) para usar no requests."""
         return (self.cert_path, self.key_path)
 
+    def add_listener(self, callback):
+        """Registra callback(token) chamado a cada troca de token (e já com o atual)."""
+        self._listeners.append(callback)
+        if self.access_token:
+            callback(self.access_token)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback(self.access_token)
+
     def get_access_token(self) -> str:
         """Retorna access_token válido, renovando se necessário."""
-        if self.access_token and time.time() < self.expires_at:
+        if self._token_valid():
             return self.access_token
 
-        self._request_token()
-        return self.access_token
+        with self._lock:
+            # Outra thread pode ter renovado enquanto aguardávamos o lock
+            if self._token_valid():
+                return self.access_token
+            self._request_token()
+            return self.access_token
 
     def _request_token(self):
         """Solicita novo token via OAuth2 Client Credentials com mTLS."""
+        with self._lock, _file_lock(self.LOCK_FILE):
+            # Outro worker pode ter renovado enquanto aguardávamos o lock
+            previous = self.access_token
+            if (
+                self._load_token()
+                and self.access_token != previous
+                and self._token_valid()
+            ):
+                _set_cached_token({
+                    "access_token": self.access_token,
+                    "expires_at": self.expires_at,
+                })
+                self._notify()
+                return
+            self._post_token_request()
+
+    def _post_token_request(self):
+        """POST no endpoint de token (client_credentials + mTLS)."""
         response = requests.post(
             INTER_TOKEN_URL,
             data={
@@ -149,7 +245,7 @@ class InterAuth:
                 f"Falha ao obter token do Inter ({response.status_code}): {error_detail}"
             )
 
-        token_data = response.json()
+        token_data = loads(response.content)
         self._save_token(token_data)
 
     def _save_token(self, token_data: dict):
@@ -163,21 +259,19 @@ class InterAuth:
         }
 
         _set_cached_token(token_cache)
+        self._notify()
 
-        try:
-            with open(self.TOKEN_FILE, "w") as f:
-                json.dump(token_cache, f)
-        except OSError:
-            pass
+        # Escrita atômica: outro worker nunca lê o arquivo pela metade
+        atomic_write(self.TOKEN_FILE, dumps(token_cache))
 
     def _load_token(self) -> bool:
         if not os.path.exists(self.TOKEN_FILE):
             return False
         try:
-            with open(self.TOKEN_FILE) as f:
-                data = json.load(f)
+            with open(self.TOKEN_FILE, "rb") as f:
+                data = loads(f.read())
             self.access_token = data.get("access_token")
             self.expires_at = data.get("expires_at", 0)
             return True
-        except (json.JSONDecodeError, OSError):
+        except (ValueError, OSError):
             return False
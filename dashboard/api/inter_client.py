@@ -3,70 +3,148 @@ Cliente HTTP para a Banking API v2 do Banco Inter PJ.
 
 Responsabilidades:
 - Autenticação mTLS (certificado em todas as requisições)
+- HTTP/2 com pool de conexões (httpx)
 - Bearer token OAuth2
-- Rate limiting e retry com backoff
-- Endpoints: saldo e extrato
+- Rate limiting (token bucket) e retry com backoff (respeita Retry-After)
+- Endpoints: saldo e extrato (extrato com parse incremental via ijson)
 """
 
+import itertools
+import ssl
 import time
 from datetime import date, timedelta
+from typing import Callable, Iterator
 
-import requests
+import httpx
+import numpy as np
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from dashboard.api.inter_auth import InterAuth
+from dashboard.api.rate_limiter import TokenBucket, backoff_delay, parse_rate_limit
+from dashboard.utils.json_utils import loads
 from dashboard.config import (
     INTER_API_BASE_URL,
     INTER_CONTA_CORRENTE,
+    INTER_RATE_LIMIT_BURST,
     MIN_REQUEST_INTERVAL,
     MAX_RETRIES,
     RETRY_BACKOFF,
+    RETRY_MAX_WAIT,
+    HTTP_TIMEOUT,
 )
 from dashboard.models.inter_models import InterBalance, InterTransaction
 
 
+def _column(df: pd.DataFrame, name: str, default=None) -> pd.Series:
+    """Coluna do DataFrame ou série constante quando o campo não veio na resposta."""
+    if name in df:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _mtls_context(cert: tuple[str, str]) -> ssl.SSLContext:
+    """Contexto TLS com o certificado de cliente (cert, key) do Inter."""
+    context = ssl.create_default_context()
+    context.load_cert_chain(*cert)
+    return context
+
+
+def _iter_statement_records(resp: httpx.Response) -> Iterator[dict]:
+    """
+    Lê o extrato em chunks e emite as transações à medida que são decodificadas.
+    Evita manter bytes + str + lista completa em memória ao mesmo tempo.
+    """
+    try:
+        chunks = resp.iter_bytes(chunk_size=64 * 1024)
+
+        # A API retorna {"transacoes": [...]} ou lista direta: decide pelo 1º byte útil
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if head.lstrip():
+                break
+        head = head.lstrip()
+        if not head:
+            return
+        prefix = "item" if head.startswith(b"[") else "transacoes.item"
+
+        records = ijson.sendable_list()
+        coro = ijson.items_coro(records, prefix, use_float=True)
+        for chunk in itertools.chain((head,), chunks):
+            coro.send(chunk)
+            yield from records
+            del records[:]
+        coro.close()
+        yield from records
+    finally:
+        resp.close()
+
+
 class InterClient:
     """Cliente para a Banking API v2 do Banco Inter."""
 
     def __init__(self, auth: InterAuth = None):
         self.auth = auth or InterAuth()
-        self.session = requests.Session()
-        self.session.cert = self.auth.cert
-        self._last_request_time = 0.0
-
-    # ─── HTTP primitivos ───
-
-    def _get_headers(self) -> dict:
-        token = self.auth.get_access_token()
-        headers = {
-            "Authorization": f"Bearer {token}",
+        # Saldo + extrato multiplexados na mesma conexão mTLS (HTTP/2)
+        self.session = httpx.Client(
+            http2=True,
+            verify=_mtls_context(self.auth.cert),
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+        # Headers estáticos uma única vez; Authorization só muda com o token
+        self.session.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json",
-        }
+        })
         if INTER_CONTA_CORRENTE:
-            headers["x-conta-corrente"] = INTER_CONTA_CORRENTE
-        return headers
+            self.session.headers["x-conta-corrente"] = INTER_CONTA_CORRENTE
+        self.auth.add_listener(self._set_token)
+        self._rate_limiter = TokenBucket(1 / MIN_REQUEST_INTERVAL, INTER_RATE_LIMIT_BURST)
+
+    # ─── HTTP primitivos ───
 
-    def _throttle(self):
-        elapsed = time.time() - self._last_request_time
-        if elapsed < MIN_REQUEST_INTERVAL:
-            time.sleep(MIN_REQUEST_INTERVAL - elapsed)
-        self._last_request_time = time.time()
+    def _set_token(self, token: str):
+        self.session.headers["Authorization"] = f"Bearer {token}"
 
-    def _request(self, method: str, path: str, **kwargs) -> dict | list | None:
+    def _request(
+        self,
+        method: str,
+        path: str,
+        parse: Callable[[httpx.Response], object] = None,
+        **kwargs,
+    ) -> dict | list | None:
+        """
+        Executa a requisição com retry. `parse` recebe a resposta já validada
+        em modo streaming (corpo lido sob demanda) no lugar do parse JSON.
+        """
         last_error = None
         for attempt in range(MAX_RETRIES):
-            self._throttle()
+            self._rate_limiter.acquire()
             try:
                 url = f"{INTER_API_BASE_URL}{path}"
-                resp = self.session.request(
-                    method, url, headers=self._get_headers(), **kwargs
-                )
+                # Renova se expirado (listeners atualizam session.headers)
+                self.auth.get_access_token()
+                request = self.session.build_request(method, url, **kwargs)
+                resp = self.session.send(request, stream=parse is not None)
+                # Cota informada pelo servidor: desacelera antes do 429
+                self._rate_limiter.sync(*parse_rate_limit(resp.headers))
+                if parse is not None:
+                    if resp.is_error:
+                        resp.close()
+                    resp.raise_for_status()
+                    return parse(resp)
                 resp.raise_for_status()
                 if resp.status_code == 204 or not resp.content:
                     return None
-                return resp.json()
-            except requests.exceptions.HTTPError as e:
-                status = e.response.status_code if e.response is not None else 0
+                return loads(resp.content)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
                 if status == 401 and attempt == 0:
                     try:
                         self.auth._request_token()
@@ -75,12 +153,19 @@ class InterClient:
                         pass
                 if status in (429, 500, 502, 503, 504):
                     last_error = e
-                    time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                    if status == 429:
+                        self._rate_limiter.drain()
+                    time.sleep(backoff_delay(
+                        attempt,
+                        RETRY_BACKOFF,
+                        e.response.headers.get("Retry-After"),
+                        max_delay=RETRY_MAX_WAIT,
+                    ))
                     continue
                 raise
-            except requests.exceptions.ConnectionError as e:
+            except httpx.TransportError as e:
                 last_error = e
-                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                time.sleep(backoff_delay(attempt, RETRY_BACKOFF, max_delay=RETRY_MAX_WAIT))
                 continue
 
         raise last_error
@@ -115,43 +200,74 @@ class InterClient:
         date_from = date_from or (today - timedelta(days=30)).strftime("%Y-%m-%d")
         date_to = date_to or today.strftime("%Y-%m-%d")
 
-        data = self.get("/banking/v2/extrato", params={
+        params = {
             "dataInicio": date_from,
             "dataFim": date_to,
-        })
+        }
 
-        if not data:
+        if ijson is not None:
+            # Transações decodificadas em stream direto para o DataFrame
+            df = self._request(
+                "GET",
+                "/banking/v2/extrato",
+                parse=lambda resp: pd.DataFrame.from_records(_iter_statement_records(resp)),
+                params=params,
+            )
+        else:
+            data = self.get("/banking/v2/extrato", params=params)
+
+            if not data:
+                return []
+
+            # A API retorna {"transacoes": [...]} ou lista direta
+            transactions_raw = data.get("transacoes", data) if isinstance(data, dict) else data
+            if not isinstance(transactions_raw, list):
+                return []
+
+            # Parsing colunar do extrato (evita loop Python por transação)
+            df = pd.DataFrame.from_records(transactions_raw)
+
+        if df.empty:
             return []
 
-        # A API retorna {"transacoes": [...]} ou lista direta
-        transactions_raw = data.get("transacoes", data) if isinstance(data, dict) else data
-        if not isinstance(transactions_raw, list):
+        raw_date = _column(df, "dataEntrada").combine_first(_column(df, "dataMovimento"))
+        datas = pd.to_datetime(
+            raw_date.astype("string").str[:10], format="%Y-%m-%d", errors="coerce"
+        )
+        valid = datas.notna()
+        if not valid.any():
             return []
 
-        transactions = []
-        for tx in transactions_raw:
-            try:
-                tx_date = date.fromisoformat(tx.get("dataEntrada", tx.get("dataMovimento", ""))[:10])
-            except (ValueError, TypeError):
-                continue
+        df = df[valid]
+        valor = pd.to_numeric(_column(df, "valor", 0), errors="coerce").fillna(0.0)
 
-            tipo = tx.get("tipoOperacao", tx.get("tipo", "")).upper()
-            if tipo not in ("CREDITO", "DEBITO", "C", "D"):
-                tipo = "DEBITO" if float(tx.get("valor", 0)) < 0 else "CREDITO"
+        tipo = (
+            _column(df, "tipoOperacao").combine_first(_column(df, "tipo"))
+            .fillna("").astype(str).str.upper()
+            .replace({"C": "CREDITO", "D": "DEBITO"})  # Normalizar tipo
+        )
+        tipo = tipo.where(
+            tipo.isin(("CREDITO", "DEBITO")),
+            np.where(valor < 0, "DEBITO", "CREDITO"),
+        )
 
-            # Normalizar tipo
-            if tipo == "C":
-                tipo = "CREDITO"
-            elif tipo == "D":
-                tipo = "DEBITO"
+        descricao = _column(df, "descricao").combine_first(_column(df, "titulo")).fillna("")
 
-            transactions.append(InterTransaction(
+        return [
+            InterTransaction(
                 data=tx_date,
-                tipo=tipo,
-                descricao=tx.get("descricao", tx.get("titulo", "")),
-                valor=abs(float(tx.get("valor", 0))),
-                titulo=tx.get("titulo", ""),
-                numero_documento=tx.get("numeroDocumento", ""),
-            ))
-
-        return transactions
+                tipo=tx_tipo,
+                descricao=tx_descricao,
+                valor=tx_valor,
+                titulo=tx_titulo,
+                numero_documento=tx_documento,
+            )
+            for tx_date, tx_tipo, tx_descricao, tx_valor, tx_titulo, tx_documento in zip(
+                datas[valid].dt.date.tolist(),
+                tipo.tolist(),
+                descricao.tolist(),
+                valor.abs().tolist(),
+                _column(df, "titulo", "").fillna("").tolist(),
+                _column(df, "numeroDocumento", "").fillna("").tolist(),
+            )
+        ]
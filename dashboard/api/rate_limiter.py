@@ -0,0 +1,129 @@
+"""
+Rate limiting e backoff para os clientes HTTP.
+
+- TokenBucket: permite rajadas de até `capacity` requisições e repõe
+  `rate` tokens por segundo, seguro entre threads
+- backoff_delay: espera entre retries, respeitando Retry-After quando
+  o servidor informa, com jitter para dessincronizar threads
+- parse_rate_limit: cota restante informada pelo servidor (RateLimit-*),
+  usada para desacelerar antes de tomar 429
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Token bucket com relógio monotônico e lock interno."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0):
+        """Bloqueia até haver `n` tokens disponíveis e os consome."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._last_refill) * self.rate,
+                )
+                self._last_refill = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                sleep_for = (n - self._tokens) / self.rate
+            time.sleep(sleep_for)
+
+    def drain(self):
+        """Zera os tokens (ex.: após 429), forçando espera pela reposição."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._last_refill = time.monotonic()
+
+    def sync(self, remaining: float | None, reset_after: float | None = None):
+        """
+        Ajusta o bucket à cota informada pelo servidor.
+
+        Com menos da metade da rajada restante, limita os tokens locais à cota
+        real; cota esgotada com reset conhecido vira "dívida" de tokens, e o
+        próximo acquire espera até o reset.
+        """
+        if remaining is None or remaining >= self.capacity / 2:
+            return
+        with self._lock:
+            if remaining <= 0 and reset_after:
+                self._tokens = -reset_after * self.rate
+            else:
+                self._tokens = min(self._tokens, max(remaining, 0.0))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Converte o header Retry-After (segundos ou HTTP-date) em segundos."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _header_float(headers, *names: str) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_rate_limit(headers) -> tuple[float | None, float | None]:
+    """
+    Lê (remaining, reset_after_segundos) dos headers RateLimit-* / X-RateLimit-*.
+
+    Reset pode vir em segundos até a renovação ou como epoch; ambos viram
+    segundos a partir de agora.
+    """
+    remaining = _header_float(headers, "RateLimit-Remaining", "X-RateLimit-Remaining")
+    if remaining is None:
+        return None, None
+    reset = _header_float(headers, "RateLimit-Reset", "X-RateLimit-Reset")
+    if reset is not None and reset > 1e9:  # epoch
+        reset -= time.time()
+    if reset is not None:
+        reset = max(reset, 0.0)
+    return remaining, reset
+
+
+def backoff_delay(
+    attempt: int,
+    base: float,
+    retry_after: str | None = None,
+    jitter: float = 0.2,
+    max_delay: float | None = None,
+) -> float:
+    """Retry-After se presente, senão backoff exponencial; ambos com ±jitter."""
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = base * (2 ** attempt)
+    delay *= random.uniform(1 - jitter, 1 + jitter)
+    if max_delay is not None:
+        delay = min(delay, max_delay)
+    return delay
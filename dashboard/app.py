@@ -7,6 +7,10 @@ Executar:
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from datetime import date as dt_date, timedelta
+from operator import attrgetter
 from pathlib import Path
 
 # Garante que o diretório raiz do projeto está no sys.path
@@ -14,27 +18,17 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+import numpy as np
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 
 from dashboard.api.contaazul_client import ContaAzulClient
-from dashboard.services.cashflow_service import (
-    build_cash_projection,
-    compute_aging,
-    compute_monthly_revenue_expenses,
-    compute_expense_breakdown,
-    build_cash_history,
-)
-from dashboard.services.metrics_service import (
-    calculate_burn_rate,
-    calculate_runway,
-    calculate_delinquency,
-    calculate_net_position,
-    calculate_liquidity,
-)
-from dashboard.utils.formatting import format_brl, format_percent, format_months
+from dashboard.models.financial_models import MetricsBundle
+from dashboard.models.inter_models import ReconciliationItem, ReconciliationResult
+from dashboard.services.cashflow_service import titles_frame
+from dashboard.services.metrics_service import compute_all
+from dashboard.utils.caching import content_digest
+from dashboard.utils.formatting import format_brl, format_brl_array, format_percent, format_months
 from dashboard.services.reconciliation_service import reconcile
 from dashboard.config import (
     CACHE_TTL,
@@ -42,7 +36,18 @@ from dashboard.config import (
     DELINQUENCY_WARNING_THRESHOLD,
     INTER_ENABLED,
 )
-from dashboard.styles import CUSTOM_CSS, PLOTLY_TEMPLATE, COLORS, CHART_COLORS, AGING_COLORS
+from dashboard.styles import (
+    CUSTOM_CSS,
+    PLOTLY_TEMPLATE_NAME,
+    PLOTLY_CONFIG,
+    PLOTLY_STATIC_CONFIG,
+    COLORS,
+    CHART_COLORS,
+    AGING_COLORS,
+    AGING_BUCKET_ORDER,
+    AGING_COLOR_SEQUENCE,
+    ensure_plotly_template,
+)
 from dashboard.components import (
     dashboard_header,
     section_header,
@@ -69,95 +74,114 @@ st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 # DATA LOADING (cached)
 # ═══════════════════════════════════════════════════════
 
-@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
-def load_raw_data():
-    """Busca todos os dados brutos da API (cache de 5 min)."""
-    client = ContaAzulClient()
-    cash = client.get_cash_balance()
-    receivables = client.get_receivables()
-    payables = client.get_payables()
-    return cash, receivables, payables
+@st.cache_resource(show_spinner=False)
+def get_client() -> ContaAzulClient:
+    """Cliente HTTP compartilhado entre reruns (pool de conexões e token persistem)."""
+    return ContaAzulClient()
 
 
 @st.cache_data(ttl=CACHE_TTL, show_spinner=False)
-def load_inter_data():
-    """Busca saldo e extrato do Banco Inter PJ (cache de 5 min)."""
+def load_raw_data():
+    """
+    Busca todos os dados brutos da API (cache de 5 min).
+
+    Retorna também os digests de conteúdo, calculados uma vez por busca,
+    que servem de chave para compute_all_metrics.
+    """
+    client = get_client()
+    # Token válido antes do fan-out (evita refresh concorrente entre threads)
+    client.auth.get_access_token()
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        cash = ex.submit(client.get_cash_balance)
+        receivables = ex.submit(client.get_receivables)
+        payables = ex.submit(client.get_payables)
+        cash, receivables, payables = cash.result(), receivables.result(), payables.result()
+    keys = (content_digest(cash), content_digest(receivables), content_digest(payables))
+    return cash, receivables, payables, keys
+
+
+@st.cache_resource(show_spinner=False)
+def get_inter_client():
+    """Cliente Inter compartilhado entre reruns (sessão mTLS e token persistem)."""
     from dashboard.api.inter_client import InterClient
-    client = InterClient()
-    balance = client.get_balance()
-    statement = client.get_statement()
-    return balance, statement
-
-
-def compute_all_metrics(cash: dict, receivables: list, payables: list) -> dict:
-    """Computa todas as métricas a partir dos dados brutos."""
-    current_cash = cash["total"]
-
-    # Aging
-    recv_aging = compute_aging(receivables)
-    pay_aging = compute_aging(payables)
-
-    recv_aging_map = {b.label: b.amount for b in recv_aging.buckets}
-    pay_aging_map = {b.label: b.amount for b in pay_aging.buckets}
-
-    # Projeção de caixa
-    projection = build_cash_projection(
-        current_cash=current_cash,
-        receivables=receivables,
-        payables=payables,
-        days=PROJECTION_DAYS,
-    )
+    return InterClient()
 
-    # Burn Rate & Runway
-    burn = calculate_burn_rate(payables)
-    runway = calculate_runway(current_cash, burn.monthly_average)
 
-    # Inadimplência
-    delinquency = calculate_delinquency(receivables)
-
-    # Posição Líquida
-    net_pos = calculate_net_position(receivables, payables)
-
-    # Liquidez
-    liquidity = calculate_liquidity(current_cash, recv_aging_map, pay_aging_map)
-
-    # Receita vs Despesa
-    monthly = compute_monthly_revenue_expenses(receivables, payables)
-
-    # Despesas por categoria
-    expenses = compute_expense_breakdown(payables)
-
-    # Histórico de caixa
-    cash_history = build_cash_history(receivables, payables, current_cash)
-
-    return {
-        "cash": cash,
-        "current_cash": current_cash,
-        "projection": projection,
-        "burn": burn,
-        "runway": runway,
-        "delinquency": delinquency,
-        "net_pos": net_pos,
-        "liquidity": liquidity,
-        "recv_aging": recv_aging,
-        "pay_aging": pay_aging,
-        "monthly": monthly,
-        "expenses": expenses,
-        "cash_history": cash_history,
-    }
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_inter_data():
+    """
+    Busca saldo e extrato do Banco Inter PJ (cache de 5 min).
+
+    Retorna também o digest do extrato, calculado uma vez por busca,
+    que serve de chave para compute_reconciliation.
+    """
+    client = get_inter_client()
+    client.auth.get_access_token()
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        balance = ex.submit(client.get_balance)
+        statement = ex.submit(client.get_statement)
+        balance, statement = balance.result(), statement.result()
+    return balance, statement, content_digest(statement)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def compute_all_metrics(
+    cash_key: str,
+    recv_key: str,
+    pay_key: str,
+    _cash: dict,
+    _receivables: list,
+    _payables: list,
+) -> MetricsBundle:
+    """
+    Computa todas as métricas a partir dos dados brutos (cache por conteúdo).
+
+    A chave são os digests de load_raw_data; os dados (prefixo "_") não
+    entram no hash. cache_resource devolve o bundle por referência:
+    reruns não pagam pickle/cópia dos DataFrames (somente leitura).
+    """
+    # Conversão colunar uma única vez; métricas viram máscaras/groupby
+    today = dt_date.today()
+    return compute_all(titles_frame(_receivables, today), titles_frame(_payables, today), _cash)
+
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def compute_reconciliation(
+    statement_key: str,
+    recv_key: str,
+    pay_key: str,
+    _transactions: list,
+    _receivables: list,
+    _payables: list,
+) -> ReconciliationResult:
+    """
+    Conciliação cacheada entre reruns (cache por conteúdo).
+
+    A chave são os digests de load_inter_data/load_raw_data; as listas
+    (prefixo "_") não são serializadas a cada clique no fragmento.
+    """
+    return reconcile(_transactions, _receivables, _payables)
 
 
 # ═══════════════════════════════════════════════════════
 # SIDEBAR
 # ═══════════════════════════════════════════════════════
 
-with st.sidebar:
-    st.title("Configuracoes")
+@st.fragment
+def refresh_button():
+    """Clique reexecuta so o fragmento; o app inteiro roda uma vez, ja sem cache."""
     if st.button("Atualizar Dados", use_container_width=True):
         load_raw_data.clear()
+        compute_all_metrics.clear()
         if INTER_ENABLED:
             load_inter_data.clear()
-        st.rerun()
+            compute_reconciliation.clear()
+        st.rerun(scope="app")
+
+
+with st.sidebar:
+    st.title("Configuracoes")
+    refresh_button()
     st.caption("Cache: 5 minutos")
     st.divider()
     if INTER_ENABLED:
@@ -184,8 +208,8 @@ st.markdown(dashboard_header(version="v3.0", sources=sources), unsafe_allow_html
 
 try:
     with st.spinner("Carregando dados da Conta Azul..."):
-        cash_raw, recv_raw, pay_raw = load_raw_data()
-        m = compute_all_metrics(cash_raw, recv_raw, pay_raw)
+        cash_raw, recv_raw, pay_raw, raw_keys = load_raw_data()
+        m = compute_all_metrics(*raw_keys, cash_raw, recv_raw, pay_raw)
 except Exception as e:
     st.error(f"Erro ao conectar com a API: {e}")
     st.info("Verifique se o token esta valido. Execute:\n`python -m dashboard.api.auth`")
@@ -196,33 +220,46 @@ except Exception as e:
 # WARNINGS
 # ═══════════════════════════════════════════════════════
 
-proj = m["projection"]
-burn = m["burn"]
-runway = m["runway"]
-delinq = m["delinquency"]
+proj = m.projection
+burn = m.burn
+runway = m.runway
+delinq = m.delinquency
 
-warnings_html = []
 
-if proj.days_until_negative is not None:
-    warnings_html.append(warning_banner(
-        f"Deficit de caixa previsto em <strong>{proj.days_until_negative} dias</strong> "
-        f"(saldo minimo projetado: {format_brl(proj.min_balance)} em {proj.min_balance_date})"
-    ))
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def make_warnings_html(data_key: tuple, _m: MetricsBundle) -> str:
+    """Banners de alerta (cacheados: reruns nao reformatam os valores)."""
+    proj = _m.projection
+    burn = _m.burn
+    runway = _m.runway
+    delinq = _m.delinquency
 
-if delinq.delinquency_rate > DELINQUENCY_WARNING_THRESHOLD * 100:
-    warnings_html.append(warning_banner(
-        f"Inadimplencia alta: <strong>{format_percent(delinq.delinquency_rate)}</strong> "
-        f"({delinq.overdue_count} titulos vencidos = {format_brl(delinq.overdue_receivable)})"
-    ))
+    warnings_html = []
 
-if not runway.is_infinite and runway.months < 6:
-    warnings_html.append(warning_banner(
-        f"Runway curto: <strong>{runway.months:.1f} meses</strong> "
-        f"(burn rate mensal: {format_brl(burn.monthly_average)})"
-    ))
+    if proj.days_until_negative is not None:
+        warnings_html.append(warning_banner(
+            f"Deficit de caixa previsto em <strong>{proj.days_until_negative} dias</strong> "
+            f"(saldo minimo projetado: {format_brl(proj.min_balance)} em {proj.min_balance_date})"
+        ))
+
+    if delinq.delinquency_rate > DELINQUENCY_WARNING_THRESHOLD * 100:
+        warnings_html.append(warning_banner(
+            f"Inadimplencia alta: <strong>{format_percent(delinq.delinquency_rate)}</strong> "
+            f"({delinq.overdue_count} titulos vencidos = {format_brl(delinq.overdue_receivable)})"
+        ))
+
+    if not runway.is_infinite and runway.months < 6:
+        warnings_html.append(warning_banner(
+            f"Runway curto: <strong>{runway.months:.1f} meses</strong> "
+            f"(burn rate mensal: {format_brl(burn.monthly_average)})"
+        ))
+
+    return "".join(warnings_html)
 
+
+warnings_html = make_warnings_html(raw_keys, m)
 if warnings_html:
-    st.markdown("".join(warnings_html), unsafe_allow_html=True)
+    st.markdown(warnings_html, unsafe_allow_html=True)
 
 
 # ═══════════════════════════════════════════════════════
@@ -236,14 +273,14 @@ c1, c2, c3, c4 = st.columns(4)
 with c1:
     st.metric(
         label="Caixa Hoje",
-        value=format_brl(m["current_cash"]),
+        value=format_brl(m.current_cash),
     )
 
 with c2:
     st.metric(
         label="Caixa em 30 Dias",
         value=format_brl(proj.balance_30d),
-        delta=format_brl(proj.balance_30d - m["current_cash"]),
+        delta=format_brl(proj.balance_30d - m.current_cash),
         help="Projecao baseada em recebiveis e pagaveis com vencimento nos proximos 30 dias",
     )
 
@@ -271,14 +308,14 @@ st.markdown(section_header("Indicadores Operacionais"), unsafe_allow_html=True)
 
 c5, c6, c7, c8 = st.columns(4)
 
-net = m["net_pos"]
-liq = m["liquidity"]
+net = m.net_pos
+liq = m.liquidity
 
 with c5:
     st.metric(
         label="A Receber",
         value=format_brl(net.receivable_total),
-        help=f"{m['recv_aging'].total:.0f} em aberto",
+        help=f"{m.recv_aging.total:.0f} em aberto",
     )
 
 with c6:
@@ -307,12 +344,21 @@ with c8:
     )
 
 # Detalhamento por conta (expander)
-if m["cash"]["contas"]:
+if m.cash["contas"]:
     with st.expander("Detalhamento por conta bancaria"):
-        contas_df = pd.DataFrame(m["cash"]["contas"])
-        contas_df = contas_df[contas_df["saldo"] != 0].sort_values("saldo", ascending=False)
-        for _, row in contas_df.iterrows():
-            st.write(f"**{row['nome']}** ({row['tipo']}): {format_brl(row['saldo'])}")
+        contas = [c for c in m.cash["contas"] if c.saldo != 0]
+        contas.sort(key=lambda c: c.saldo, reverse=True)
+        # Uma unica tabela no lugar de um st.write por conta
+        if contas:
+            st.dataframe(
+                pd.DataFrame({
+                    "Conta": [c.nome for c in contas],
+                    "Tipo": [c.tipo for c in contas],
+                    "Saldo": format_brl_array([c.saldo for c in contas]),
+                }),
+                use_container_width=True,
+                hide_index=True,
+            )
 
 
 # ═══════════════════════════════════════════════════════
@@ -324,80 +370,101 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-df_proj = proj.daily.copy()
 
-fig_proj = go.Figure()
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def make_projection_chart(data_key: tuple, today, _proj):
+    """
+    Figura da projecao (cacheada: reruns nao reconstroem/validam o Plotly).
 
-fig_proj.add_trace(go.Scatter(
-    x=df_proj["date"],
-    y=df_proj["balance"],
-    mode="lines",
-    fill="tozeroy",
-    line=dict(color=COLORS["primary"], width=2),
-    fillcolor="rgba(99,102,241,0.08)",
-    name="Saldo Projetado",
-    hovertemplate="<b>%{x}</b><br>Saldo: R$ %{y:,.2f}<extra></extra>",
-))
+    Nas figuras, a chave e o digest dos dados brutos (data_key); os objetos
+    de metricas (prefixo "_") nao sao re-hasheados a cada rerun.
+    """
+    # Plotly importado sob demanda: erro na carga de dados nao paga o import
+    import plotly.graph_objects as go
 
-# Linha de zero
-fig_proj.add_hline(y=0, line_dash="dash", line_color=COLORS["danger"], opacity=0.4)
+    ensure_plotly_template()
 
-# Marcadores 30d e 60d
-from datetime import date as dt_date, timedelta
-today = dt_date.today()
-
-for offset, label in [(30, "30d"), (60, "60d")]:
-    mark_date = today + timedelta(days=offset)
-    fig_proj.add_shape(
-        type="line",
-        x0=mark_date, x1=mark_date,
-        y0=0, y1=1,
-        yref="paper",
-        line=dict(color=COLORS["text_muted"], dash="dot", width=1),
-        opacity=0.4,
-    )
-    fig_proj.add_annotation(
-        x=mark_date, y=1, yref="paper",
-        text=label, showarrow=False,
-        font=dict(size=10, color=COLORS["text_muted"]),
-        yshift=10,
-    )
+    df_proj = _proj.daily
+
+    fig_proj = go.Figure()
 
-# Marcador de saldo minimo
-if proj.min_balance_date:
     fig_proj.add_trace(go.Scatter(
-        x=[proj.min_balance_date],
-        y=[proj.min_balance],
-        mode="markers+text",
-        marker=dict(color=COLORS["danger"], size=10, symbol="diamond"),
-        text=[f"Min: {format_brl(proj.min_balance)}"],
-        textposition="bottom center",
-        textfont=dict(size=10, color=COLORS["danger"]),
-        name="Saldo Minimo",
-        showlegend=False,
+        x=df_proj["date"],
+        y=df_proj["balance"],
+        mode="lines",
+        fill="tozeroy",
+        line=dict(color=COLORS["primary"], width=2),
+        fillcolor="rgba(99,102,241,0.08)",
+        name="Saldo Projetado",
+        hovertemplate="<b>%{x}</b><br>Saldo: R$ %{y:,.2f}<extra></extra>",
     ))
 
-fig_proj.update_layout(
-    template=PLOTLY_TEMPLATE,
-    height=350,
-    yaxis=dict(title="R$", tickformat=",.0f"),
-    showlegend=False,
-    hovermode="x unified",
-)
+    # Linha de zero
+    fig_proj.add_hline(y=0, line_dash="dash", line_color=COLORS["danger"], opacity=0.4)
+
+    # Marcadores 30d e 60d
+    for offset, label in [(30, "30d"), (60, "60d")]:
+        mark_date = today + timedelta(days=offset)
+        fig_proj.add_shape(
+            type="line",
+            x0=mark_date, x1=mark_date,
+            y0=0, y1=1,
+            yref="paper",
+            line=dict(color=COLORS["text_muted"], dash="dot", width=1),
+            opacity=0.4,
+        )
+        fig_proj.add_annotation(
+            x=mark_date, y=1, yref="paper",
+            text=label, showarrow=False,
+            font=dict(size=10, color=COLORS["text_muted"]),
+            yshift=10,
+        )
+
+    # Marcador de saldo minimo
+    if _proj.min_balance_date:
+        fig_proj.add_trace(go.Scatter(
+            x=[_proj.min_balance_date],
+            y=[_proj.min_balance],
+            mode="markers+text",
+            marker=dict(color=COLORS["danger"], size=10, symbol="diamond"),
+            text=[f"Min: {format_brl(_proj.min_balance)}"],
+            textposition="bottom center",
+            textfont=dict(size=10, color=COLORS["danger"]),
+            name="Saldo Minimo",
+            showlegend=False,
+        ))
+
+    fig_proj.update_layout(
+        template=PLOTLY_TEMPLATE_NAME,
+        height=350,
+        yaxis=dict(title="R$", tickformat=",.0f"),
+        showlegend=False,
+        hovermode="x unified",
+    )
+    return fig_proj
 
-st.plotly_chart(fig_proj, use_container_width=True)
 
-# Sub-metricas da projecao
-pc1, pc2, pc3 = st.columns(3)
-with pc1:
-    st.caption(f"Caixa em 30d: **{format_brl(proj.balance_30d)}**")
-with pc2:
-    st.caption(f"Caixa em 60d: **{format_brl(proj.balance_60d)}**")
-with pc3:
-    if proj.days_until_negative is not None:
-        st.caption(f"Deficit em: **{proj.days_until_negative} dias**")
-    else:
-        st.caption("Caixa positivo nos proximos 60 dias")
+def render_projection(data_key: tuple, proj):
+    st.plotly_chart(
+        make_projection_chart(data_key, dt_date.today(), proj),
+        use_container_width=True,
+        config=PLOTLY_CONFIG,
+    )
+
+    # Sub-metricas da projecao
+    pc1, pc2, pc3 = st.columns(3)
+    with pc1:
+        st.caption(f"Caixa em 30d: **{format_brl(proj.balance_30d)}**")
+    with pc2:
+        st.caption(f"Caixa em 60d: **{format_brl(proj.balance_60d)}**")
+    with pc3:
+        if proj.days_until_negative is not None:
+            st.caption(f"Deficit em: **{proj.days_until_negative} dias**")
+        else:
+            st.caption("Caixa positivo nos proximos 60 dias")
+
+
+render_projection(raw_keys, proj)
 
 
 # ═══════════════════════════════════════════════════════
@@ -407,12 +474,25 @@ with pc3:
 st.markdown(section_header("Aging de Recebiveis e Pagaveis"), unsafe_allow_html=True)
 
 
-def make_aging_chart(aging_summary, title: str):
+@st.cache_resource(ttl=CACHE_TTL, max_entries=8, show_spinner=False)
+def make_aging_chart(data_key: tuple, title: str, _aging_summary):
+    # Sem titulos em aberto: nao monta/serializa figura vazia
+    if len(_aging_summary.labels) == 0 or _aging_summary.total == 0:
+        return None
+
+    import plotly.graph_objects as go
+
+    ensure_plotly_template()
+
     fig = go.Figure()
-    labels = [b.label for b in aging_summary.buckets]
-    values = [b.amount for b in aging_summary.buckets]
-    counts = [b.count for b in aging_summary.buckets]
-    colors = [AGING_COLORS.get(b.label, COLORS["text_muted"]) for b in aging_summary.buckets]
+    # Colunas do resumo direto para os eixos
+    labels = _aging_summary.labels.tolist()
+    values = _aging_summary.amounts
+    counts = _aging_summary.counts.tolist()
+    if labels == AGING_BUCKET_ORDER:
+        colors = AGING_COLOR_SEQUENCE
+    else:
+        colors = [AGING_COLORS.get(label, COLORS["text_muted"]) for label in labels]
 
     fig.add_trace(go.Bar(
         y=labels,
@@ -420,17 +500,17 @@ def make_aging_chart(aging_summary, title: str):
         orientation="h",
         marker_color=colors,
         text=[
-            f"{format_brl(v)}  ({c} {'titulo' if c == 1 else 'titulos'})"
-            for v, c in zip(values, counts)
+            f"{v_fmt}  ({c} {'titulo' if c == 1 else 'titulos'})"
+            for v_fmt, c in zip(_aging_summary.amounts_fmt, counts)
         ],
         textposition="auto",
         textfont=dict(size=11, color=COLORS["text_primary"]),
     ))
 
     fig.update_layout(
-        template=PLOTLY_TEMPLATE,
+        template=PLOTLY_TEMPLATE_NAME,
         title=dict(
-            text=f"{title}<br><sup style='color:{COLORS['text_muted']}'>{format_brl(aging_summary.total)} total</sup>",
+            text=f"{title}<br><sup style='color:{COLORS['text_muted']}'>{format_brl(_aging_summary.total)} total</sup>",
             font=dict(size=14, color=COLORS["text_primary"]),
         ),
         height=280,
@@ -442,15 +522,25 @@ def make_aging_chart(aging_summary, title: str):
     return fig
 
 
-col_recv, col_pay = st.columns(2)
+def render_aging(data_key: tuple, recv_aging, pay_aging):
+    col_recv, col_pay = st.columns(2)
 
-with col_recv:
-    fig_recv = make_aging_chart(m["recv_aging"], "Contas a Receber")
-    st.plotly_chart(fig_recv, use_container_width=True)
+    with col_recv:
+        fig_recv = make_aging_chart(data_key, "Contas a Receber", recv_aging)
+        if fig_recv is not None:
+            st.plotly_chart(fig_recv, use_container_width=True, config=PLOTLY_STATIC_CONFIG)
+        else:
+            st.info("Nenhuma conta a receber em aberto.")
 
-with col_pay:
-    fig_pay = make_aging_chart(m["pay_aging"], "Contas a Pagar")
-    st.plotly_chart(fig_pay, use_container_width=True)
+    with col_pay:
+        fig_pay = make_aging_chart(data_key, "Contas a Pagar", pay_aging)
+        if fig_pay is not None:
+            st.plotly_chart(fig_pay, use_container_width=True, config=PLOTLY_STATIC_CONFIG)
+        else:
+            st.info("Nenhuma conta a pagar em aberto.")
+
+
+render_aging(raw_keys, m.recv_aging, m.pay_aging)
 
 
 # ═══════════════════════════════════════════════════════
@@ -459,52 +549,76 @@ with col_pay:
 
 st.markdown(section_header("Receita vs Despesa", "Visao mensal"), unsafe_allow_html=True)
 
-monthly_data = m["monthly"]
-
-fig_monthly = go.Figure()
-
-fig_monthly.add_trace(go.Bar(
-    x=[r.month_label for r in monthly_data],
-    y=[r.revenue for r in monthly_data],
-    name="Receita",
-    marker_color=COLORS["success"],
-    text=[format_brl(r.revenue) for r in monthly_data],
-    textposition="outside",
-    textfont=dict(size=10, color=COLORS["text_secondary"]),
-))
-
-fig_monthly.add_trace(go.Bar(
-    x=[r.month_label for r in monthly_data],
-    y=[r.expense for r in monthly_data],
-    name="Despesa",
-    marker_color=COLORS["danger"],
-    text=[format_brl(r.expense) for r in monthly_data],
-    textposition="outside",
-    textfont=dict(size=10, color=COLORS["text_secondary"]),
-))
-
-fig_monthly.add_trace(go.Scatter(
-    x=[r.month_label for r in monthly_data],
-    y=[r.result for r in monthly_data],
-    name="Resultado",
-    mode="lines+markers+text",
-    line=dict(color=COLORS["primary"], width=2),
-    marker=dict(size=8, color=COLORS["primary"]),
-    text=[format_brl(r.result) for r in monthly_data],
-    textposition="top center",
-    textfont=dict(size=9, color=COLORS["primary_light"]),
-))
-
-fig_monthly.update_layout(
-    template=PLOTLY_TEMPLATE,
-    barmode="group",
-    height=380,
-    margin=dict(l=10, r=10, t=20, b=10),
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    yaxis=dict(title="R$", tickformat=",.0f"),
-)
 
-st.plotly_chart(fig_monthly, use_container_width=True)
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def make_monthly_chart(data_key: tuple, _monthly_data):
+    import plotly.graph_objects as go
+
+    ensure_plotly_template()
+
+    # Colunas da série direto para os eixos; textos ja formatados na série
+    month_labels = _monthly_data.labels.tolist()
+    revenues = _monthly_data.revenue
+    expenses_monthly = _monthly_data.expense
+    results = _monthly_data.result
+    revenue_text = _monthly_data.revenue_fmt
+    expense_text = _monthly_data.expense_fmt
+    result_text = _monthly_data.result_fmt
+
+    fig_monthly = go.Figure()
+
+    fig_monthly.add_trace(go.Bar(
+        x=month_labels,
+        y=revenues,
+        name="Receita",
+        marker_color=COLORS["success"],
+        text=revenue_text,
+        textposition="outside",
+        textfont=dict(size=10, color=COLORS["text_secondary"]),
+    ))
+
+    fig_monthly.add_trace(go.Bar(
+        x=month_labels,
+        y=expenses_monthly,
+        name="Despesa",
+        marker_color=COLORS["danger"],
+        text=expense_text,
+        textposition="outside",
+        textfont=dict(size=10, color=COLORS["text_secondary"]),
+    ))
+
+    fig_monthly.add_trace(go.Scatter(
+        x=month_labels,
+        y=results,
+        name="Resultado",
+        mode="lines+markers+text",
+        line=dict(color=COLORS["primary"], width=2),
+        marker=dict(size=8, color=COLORS["primary"]),
+        text=result_text,
+        textposition="top center",
+        textfont=dict(size=9, color=COLORS["primary_light"]),
+    ))
+
+    fig_monthly.update_layout(
+        template=PLOTLY_TEMPLATE_NAME,
+        barmode="group",
+        height=380,
+        margin=dict(l=10, r=10, t=20, b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        yaxis=dict(title="R$", tickformat=",.0f"),
+    )
+    return fig_monthly
+
+
+def render_monthly(data_key: tuple, monthly_data):
+    st.plotly_chart(
+        make_monthly_chart(data_key, monthly_data),
+        use_container_width=True,
+        config=PLOTLY_STATIC_CONFIG,
+    )
+
+
+render_monthly(raw_keys, m.monthly)
 
 
 # ═══════════════════════════════════════════════════════
@@ -513,23 +627,30 @@ st.plotly_chart(fig_monthly, use_container_width=True)
 
 st.markdown(section_header("Despesas por Categoria", "Mes atual"), unsafe_allow_html=True)
 
-expenses = m["expenses"]
 
-if expenses:
+@st.cache_resource(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def make_expense_donut(data_key: tuple, _expenses):
+    import plotly.graph_objects as go
+
+    ensure_plotly_template()
+
+    expense_labels = _expenses.names.tolist()
+    expense_values = _expenses.amounts
+    total_exp = float(expense_values.sum())
+
     fig_donut = go.Figure(go.Pie(
-        labels=[e.name for e in expenses],
-        values=[e.amount for e in expenses],
+        labels=expense_labels,
+        values=expense_values,
         hole=0.5,
         textinfo="label+percent",
         textposition="outside",
         textfont=dict(size=11, color=COLORS["text_secondary"]),
-        marker=dict(colors=CHART_COLORS[:len(expenses)]),
+        marker=dict(colors=CHART_COLORS[:len(_expenses)]),
         outsidetextfont=dict(color=COLORS["text_secondary"]),
     ))
 
-    total_exp = sum(e.amount for e in expenses)
     fig_donut.update_layout(
-        template=PLOTLY_TEMPLATE,
+        template=PLOTLY_TEMPLATE_NAME,
         height=380,
         margin=dict(l=10, r=10, t=10, b=10),
         showlegend=False,
@@ -540,170 +661,220 @@ if expenses:
             showarrow=False,
         )],
     )
+    return fig_donut
+
+
+def render_expenses(data_key: tuple, expenses):
+    if expenses:
+        st.plotly_chart(
+            make_expense_donut(data_key, expenses),
+            use_container_width=True,
+            config=PLOTLY_STATIC_CONFIG,
+        )
+    else:
+        st.info("Nenhuma despesa registrada no mes atual.")
 
-    st.plotly_chart(fig_donut, use_container_width=True)
-else:
-    st.info("Nenhuma despesa registrada no mes atual.")
+
+render_expenses(raw_keys, m.expenses)
 
 
 # ═══════════════════════════════════════════════════════
 # ROW 7 — BANCO INTER PJ (condicional)
 # ═══════════════════════════════════════════════════════
 
-if INTER_ENABLED:
-    st.markdown(section_header("Banco Inter PJ", "Saldo e extrato"), unsafe_allow_html=True)
+def _open_inter_extract():
+    st.session_state["inter_extract_opened"] = True
 
-    inter_balance = None
-    inter_statement = None
-    inter_error = None
+
+@st.fragment
+def render_inter(raw_keys: tuple, recv_raw: list, pay_raw: list):
+    """
+    Secao Inter isolada em fragmento: seus reruns nao reexecutam as linhas
+    da Conta Azul, e o extrato (mTLS) so e buscado aqui.
+    """
+    st.markdown(section_header("Banco Inter PJ", "Saldo e extrato"), unsafe_allow_html=True)
 
     try:
         with st.spinner("Carregando dados do Banco Inter..."):
-            inter_balance, inter_statement = load_inter_data()
+            inter_balance, inter_statement, statement_key = load_inter_data()
     except Exception as e:
-        inter_error = str(e)
-
-    if inter_error:
-        st.error(f"Erro ao conectar com o Banco Inter: {inter_error}")
+        st.error(f"Erro ao conectar com o Banco Inter: {e}")
         st.info("Verifique se os certificados (.crt/.key) e credenciais estao corretos.")
-    else:
-        # KPIs do Inter
-        ic1, ic2, ic3 = st.columns(3)
-
-        with ic1:
-            st.metric(
-                label="Saldo Disponivel",
-                value=format_brl(inter_balance.disponivel),
-            )
-
-        with ic2:
-            total_inter = inter_balance.disponivel + inter_balance.bloqueado_cheque + inter_balance.bloqueado_judicial
-            st.metric(
-                label="Saldo Total (incl. bloqueado)",
-                value=format_brl(total_inter),
-                help=(
-                    f"Disponivel: {format_brl(inter_balance.disponivel)}\n"
-                    f"Bloqueado cheque: {format_brl(inter_balance.bloqueado_cheque)}\n"
-                    f"Bloqueado judicial: {format_brl(inter_balance.bloqueado_judicial)}"
-                ),
-            )
-
-        with ic3:
-            st.metric(
-                label="Transacoes (30d)",
-                value=str(len(inter_statement)),
-                help="Quantidade de transacoes nos ultimos 30 dias",
-            )
-
-        # Extrato
-        if inter_statement:
-            with st.expander(f"Extrato Banco Inter ({len(inter_statement)} transacoes)", expanded=False):
-                extrato_rows = []
-                for tx in inter_statement:
-                    sinal = "+" if tx.tipo == "CREDITO" else "-"
-                    extrato_rows.append({
-                        "Data": tx.data.strftime("%d/%m/%Y"),
-                        "Tipo": tx.tipo,
-                        "Descricao": tx.descricao,
-                        "Valor": f"{sinal} {format_brl(tx.valor)}",
-                    })
+        return
+
+    # KPIs do Inter
+    ic1, ic2, ic3 = st.columns(3)
+
+    with ic1:
+        st.metric(
+            label="Saldo Disponivel",
+            value=format_brl(inter_balance.disponivel),
+        )
+
+    with ic2:
+        total_inter = inter_balance.disponivel + inter_balance.bloqueado_cheque + inter_balance.bloqueado_judicial
+        st.metric(
+            label="Saldo Total (incl. bloqueado)",
+            value=format_brl(total_inter),
+            help=(
+                f"Disponivel: {format_brl(inter_balance.disponivel)}\n"
+                f"Bloqueado cheque: {format_brl(inter_balance.bloqueado_cheque)}\n"
+                f"Bloqueado judicial: {format_brl(inter_balance.bloqueado_judicial)}"
+            ),
+        )
+
+    with ic3:
+        st.metric(
+            label="Transacoes (30d)",
+            value=str(len(inter_statement)),
+            help="Quantidade de transacoes nos ultimos 30 dias",
+        )
+
+    # Extrato
+    if inter_statement:
+        with st.expander(f"Extrato Banco Inter ({len(inter_statement)} transacoes)", expanded=False):
+            # Expander fechado tambem executa o corpo: tabela so e montada sob demanda
+            if not st.session_state.get("inter_extract_opened"):
+                st.button("Mostrar extrato", on_click=_open_inter_extract)
+            else:
+                # Tabela montada por colunas: datas, sinal e valores formatados em lote
+                tipos = np.array([tx.tipo for tx in inter_statement], dtype=object)
+                sinais = np.where(tipos == "CREDITO", "+ ", "- ").astype(object)
+                valores = np.array(format_brl_array([tx.valor for tx in inter_statement]), dtype=object)
+                extrato_df = pd.DataFrame({
+                    "Data": pd.to_datetime([tx.data for tx in inter_statement]).strftime("%d/%m/%Y"),
+                    "Tipo": tipos,
+                    "Descricao": [tx.descricao for tx in inter_statement],
+                    "Valor": sinais + valores,
+                })
                 st.dataframe(
-                    pd.DataFrame(extrato_rows),
+                    extrato_df,
                     use_container_width=True,
                     hide_index=True,
                 )
 
-        # ═══════════════════════════════════════════════════════
-        # ROW 8 — CONCILIACAO BANCARIA
-        # ═══════════════════════════════════════════════════════
-
-        if inter_statement:
-            st.markdown(
-                section_header(
-                    "Conciliacao Bancaria",
-                    "Cruzamento automatico: extrato Inter x contas a pagar/receber Conta Azul",
-                ),
-                unsafe_allow_html=True,
-            )
+    # Conciliacao (ROW 8) so faz sentido com extrato
+    if inter_statement:
+        render_reconciliation((statement_key, *raw_keys[1:]), inter_statement, recv_raw, pay_raw)
 
-            recon = reconcile(inter_statement, recv_raw, pay_raw)
 
-            # KPIs de conciliacao
-            rc1, rc2, rc3, rc4 = st.columns(4)
+# ═══════════════════════════════════════════════════════
+# ROW 8 — CONCILIACAO BANCARIA
+# ═══════════════════════════════════════════════════════
 
-            with rc1:
-                st.metric(
-                    label="Conciliados",
-                    value=str(recon.conciliados),
-                    help=f"Valor: {format_brl(recon.valor_conciliado)}",
-                )
+# Colunas do DataFrame de itens, na ordem dos campos do dataclass
+_RECON_COLUMNS = [f.name for f in fields(ReconciliationItem)]
+_RECON_ROW = attrgetter(*_RECON_COLUMNS)
 
-            with rc2:
-                st.metric(
-                    label="Taxa de Conciliacao",
-                    value=format_percent(recon.taxa_conciliacao),
-                )
 
-            with rc3:
-                st.metric(
-                    label="So no Banco",
-                    value=str(recon.so_banco),
-                    help=f"Valor: {format_brl(recon.valor_so_banco)}",
-                )
+def _format_dates(values: pd.Series) -> list[str]:
+    """Datas (date ou None) em dd/mm/aaaa, string vazia quando ausentes."""
+    return pd.to_datetime(values).dt.strftime("%d/%m/%Y").fillna("").tolist()
 
-            with rc4:
-                st.metric(
-                    label="So no ERP",
-                    value=str(recon.so_erp),
-                    help=f"Valor: {format_brl(recon.valor_so_erp)}",
-                )
 
-            # Tabela de conciliacao
-            if recon.items:
-                tab_conc, tab_banco, tab_erp = st.tabs([
-                    f"Conciliados ({recon.conciliados})",
-                    f"So Banco ({recon.so_banco})",
-                    f"So ERP ({recon.so_erp})",
-                ])
-
-                with tab_conc:
-                    conc_items = [i for i in recon.items if i.status == "CONCILIADO"]
-                    if conc_items:
-                        rows = [{
-                            "Data Banco": i.banco_data.strftime("%d/%m/%Y") if i.banco_data else "",
-                            "Banco": i.banco_descricao,
-                            "Valor Banco": format_brl(i.banco_valor),
-                            "ERP": i.erp_descricao,
-                            "Valor ERP": format_brl(i.erp_valor),
-                        } for i in conc_items]
-                        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-                    else:
-                        st.info("Nenhum item conciliado.")
-
-                with tab_banco:
-                    banco_items = [i for i in recon.items if i.status == "SO_BANCO"]
-                    if banco_items:
-                        rows = [{
-                            "Data": i.banco_data.strftime("%d/%m/%Y") if i.banco_data else "",
-                            "Tipo": i.banco_tipo,
-                            "Descricao": i.banco_descricao,
-                            "Valor": format_brl(i.banco_valor),
-                        } for i in banco_items]
-                        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-                    else:
-                        st.success("Todas as transacoes do banco foram conciliadas!")
-
-                with tab_erp:
-                    erp_items = [i for i in recon.items if i.status == "SO_ERP"]
-                    if erp_items:
-                        rows = [{
-                            "Data Vencimento": i.erp_data_vencimento.strftime("%d/%m/%Y") if i.erp_data_vencimento else "",
-                            "Descricao": i.erp_descricao,
-                            "Valor": format_brl(i.erp_valor),
-                        } for i in erp_items]
-                        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-                    else:
-                        st.success("Todos os itens do ERP tem correspondencia no banco!")
+@st.fragment
+def render_reconciliation(recon_key: tuple, inter_statement: list, recv_raw: list, pay_raw: list):
+    """Conciliacao em fragmento proprio, renderizada dentro da secao Inter."""
+    st.markdown(
+        section_header(
+            "Conciliacao Bancaria",
+            "Cruzamento automatico: extrato Inter x contas a pagar/receber Conta Azul",
+        ),
+        unsafe_allow_html=True,
+    )
+
+    recon = compute_reconciliation(*recon_key, inter_statement, recv_raw, pay_raw)
+
+    # KPIs de conciliacao
+    rc1, rc2, rc3, rc4 = st.columns(4)
+
+    with rc1:
+        st.metric(
+            label="Conciliados",
+            value=str(recon.conciliados),
+            help=f"Valor: {format_brl(recon.valor_conciliado)}",
+        )
+
+    with rc2:
+        st.metric(
+            label="Taxa de Conciliacao",
+            value=format_percent(recon.taxa_conciliacao),
+        )
+
+    with rc3:
+        st.metric(
+            label="So no Banco",
+            value=str(recon.so_banco),
+            help=f"Valor: {format_brl(recon.valor_so_banco)}",
+        )
+
+    with rc4:
+        st.metric(
+            label="So no ERP",
+            value=str(recon.so_erp),
+            help=f"Valor: {format_brl(recon.valor_so_erp)}",
+        )
+
+    # Tabela de conciliacao
+    if recon.items:
+        # Uma tabela por vez: st.tabs renderiza o conteudo de todas as abas
+        status_labels = {
+            "CONCILIADO": f"Conciliados ({recon.conciliados})",
+            "SO_BANCO": f"So Banco ({recon.so_banco})",
+            "SO_ERP": f"So ERP ({recon.so_erp})",
+        }
+        status = st.segmented_control(
+            "Status",
+            list(status_labels),
+            format_func=status_labels.get,
+            default="CONCILIADO",
+            key="recon_status",
+            label_visibility="collapsed",
+        ) or "CONCILIADO"
+
+        # Itens separados por status numa unica passada (tuplas, sem dict por item)
+        items_df = pd.DataFrame.from_records(
+            list(map(_RECON_ROW, recon.items)), columns=_RECON_COLUMNS,
+        )
+        by_status = dict(list(items_df.groupby("status", sort=False)))
+        selected = by_status.get(status)
+
+        if status == "CONCILIADO":
+            if selected is not None:
+                st.dataframe(pd.DataFrame({
+                    "Data Banco": _format_dates(selected["banco_data"]),
+                    "Banco": selected["banco_descricao"].tolist(),
+                    "Valor Banco": format_brl_array(selected["banco_valor"]),
+                    "ERP": selected["erp_descricao"].tolist(),
+                    "Valor ERP": format_brl_array(selected["erp_valor"]),
+                }), use_container_width=True, hide_index=True)
+            else:
+                st.info("Nenhum item conciliado.")
+
+        elif status == "SO_BANCO":
+            if selected is not None:
+                st.dataframe(pd.DataFrame({
+                    "Data": _format_dates(selected["banco_data"]),
+                    "Tipo": selected["banco_tipo"].tolist(),
+                    "Descricao": selected["banco_descricao"].tolist(),
+                    "Valor": format_brl_array(selected["banco_valor"]),
+                }), use_container_width=True, hide_index=True)
+            else:
+                st.success("Todas as transacoes do banco foram conciliadas!")
+
+        else:
+            if selected is not None:
+                st.dataframe(pd.DataFrame({
+                    "Data Vencimento": _format_dates(selected["erp_data_vencimento"]),
+                    "Descricao": selected["erp_descricao"].tolist(),
+                    "Valor": format_brl_array(selected["erp_valor"]),
+                }), use_container_width=True, hide_index=True)
+            else:
+                st.success("Todos os itens do ERP tem correspondencia no banco!")
+
+
+if INTER_ENABLED:
+    render_inter(raw_keys, recv_raw, pay_raw)
 
 
 # ═══════════════════════════════════════════════════════
@@ -47,8 +47,16 @@ SCOPE = ""  # Conta Azul não requer scope explícito
 
 API_BASE_URL = "https://api-v2.contaazul.com/v1"
 MIN_REQUEST_INTERVAL = 0.1  # 100ms (respeita 10 req/s)
+RATE_LIMIT_PER_SECOND = 10  # token bucket: reposição (10 req/s = 600 req/min)
+RATE_LIMIT_BURST = 10  # token bucket: capacidade (rajada máxima)
 MAX_RETRIES = 3
 RETRY_BACKOFF = 1.0  # segundos
+RETRY_MAX_WAIT = 32.0  # teto de espera entre retries (segundos)
+MAX_WORKERS = 8  # requisições concorrentes (fan-out de saldos)
+PAGE_SIZE = 200  # itens por página (a API pode limitar; vale o tamanho efetivo)
+MAX_PAGES = 100  # teto da paginação sequencial sem itens_totais (20 mil títulos com PAGE_SIZE)
+HTTP_TIMEOUT = 30.0  # segundos
+HTTP_MAX_CONNECTIONS = 20  # pool de conexões (HTTP/2 multiplexa sobre elas)
 
 # ─── Cache ───
 
@@ -64,6 +72,7 @@ INTER_CONTA_CORRENTE = _get_secret("INTER_CONTA_CORRENTE")
 INTER_API_BASE_URL = "https://cdpj.partners.bancointer.com.br"
 INTER_TOKEN_URL = "https://cdpj.partners.bancointer.com.br/oauth/v2/token"
 INTER_ENABLED = bool(INTER_CLIENT_ID and INTER_CLIENT_SECRET)
+INTER_RATE_LIMIT_BURST = 5  # token bucket: rajada máxima (reposição = 1/MIN_REQUEST_INTERVAL)
 
 # ─── Dashboard ───
 
@@ -5,10 +5,35 @@ Dataclasses tipadas para resultados de cálculos do dashboard.
 
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Optional
+from functools import cached_property
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
+from dashboard.utils.formatting import format_brl_array
+
+
+def _labels(values=()) -> np.ndarray:
+    # dtype unicode (não object): hash/pickle pelo conteúdo, não por ponteiro
+    return np.asarray(list(values), dtype=str)
+
+
+def _floats(values=()) -> np.ndarray:
+    return np.asarray(list(values), dtype=np.float64)
+
+
+# ─── Cash Position ───
+
+@dataclass(slots=True)
+class AccountBalance:
+    """Saldo atual de uma conta financeira."""
+    id: Optional[str] = None
+    nome: str = "Conta sem nome"
+    tipo: str = ""
+    banco: str = ""
+    saldo: float = 0.0
+
 
 # ─── Cash Flow Projection ───
 
@@ -30,7 +55,7 @@ class BurnRate:
     """Taxa de queima mensal."""
     monthly_average: float = 0.0
     months_used: int = 0
-    monthly_breakdown: list = field(default_factory=list)
+    monthly_breakdown: Optional[list] = None
 
 
 # ─── Runway ───
@@ -66,10 +91,26 @@ class NetPosition:
 
 # ─── Cash History ───
 
-@dataclass
+@dataclass(eq=False)
 class CashHistory:
-    """Histórico mensal de caixa estimado."""
-    monthly: pd.DataFrame  # columns: month, balance
+    """Histórico mensal de caixa estimado, em colunas (mais antigo primeiro)."""
+    labels: np.ndarray = field(default_factory=_labels)
+    keys: np.ndarray = field(default_factory=_labels)
+    balances: np.ndarray = field(default_factory=_floats)
+
+    @cached_property
+    def monthly(self) -> pd.DataFrame:
+        """DataFrame montado só no primeiro acesso (o painel não usa o histórico)."""
+        return pd.DataFrame({
+            "month": self.labels,
+            "month_key": self.keys,
+            "balance": self.balances,
+        })
+
+    @property
+    def rows(self) -> list[dict]:
+        """Visão linha a linha (compatibilidade)."""
+        return self.monthly.to_dict("records")
 
 
 # ─── Aging ───
@@ -82,12 +123,34 @@ class AgingBucket:
     count: int = 0
 
 
-@dataclass
+@dataclass(eq=False)
 class AgingSummary:
-    """Resumo de aging (receber ou pagar)."""
-    buckets: list[AgingBucket] = field(default_factory=list)
+    """Resumo de aging (receber ou pagar), em colunas: um array por campo."""
+    labels: np.ndarray = field(default_factory=_labels)
+    amounts: np.ndarray = field(default_factory=_floats)
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
     total: float = 0.0
 
+    @cached_property
+    def amounts_by_label(self) -> dict[str, float]:
+        """Mapa bucket → valor (entrada de calculate_liquidity)."""
+        return dict(zip(self.labels.tolist(), self.amounts.tolist()))
+
+    @cached_property
+    def amounts_fmt(self) -> list[str]:
+        """Valores em R$, formatados uma vez por resumo."""
+        return format_brl_array(self.amounts)
+
+    @property
+    def buckets(self) -> list[AgingBucket]:
+        """Visão linha a linha (compatibilidade)."""
+        return [
+            AgingBucket(label=label, amount=amount, count=count)
+            for label, amount, count in zip(
+                self.labels.tolist(), self.amounts.tolist(), self.counts.tolist()
+            )
+        ]
+
 
 # ─── Revenue vs Expenses ───
 
@@ -101,6 +164,42 @@ class MonthlyResult:
     result: float = 0.0
 
 
+@dataclass(eq=False)
+class MonthlySeries:
+    """Série mensal de receita vs despesa, em colunas (iterável como MonthlyResult)."""
+    labels: np.ndarray = field(default_factory=_labels)
+    keys: np.ndarray = field(default_factory=_labels)
+    revenue: np.ndarray = field(default_factory=_floats)
+    expense: np.ndarray = field(default_factory=_floats)
+    result: np.ndarray = field(default_factory=_floats)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # Textos em R$ formatados uma vez por série
+    @cached_property
+    def revenue_fmt(self) -> list[str]:
+        return format_brl_array(self.revenue)
+
+    @cached_property
+    def expense_fmt(self) -> list[str]:
+        return format_brl_array(self.expense)
+
+    @cached_property
+    def result_fmt(self) -> list[str]:
+        return format_brl_array(self.result)
+
+    def __iter__(self) -> Iterator[MonthlyResult]:
+        for label, key, revenue, expense, result in zip(
+            self.labels.tolist(), self.keys.tolist(), self.revenue.tolist(),
+            self.expense.tolist(), self.result.tolist(),
+        ):
+            yield MonthlyResult(
+                month_label=label, month_key=key,
+                revenue=revenue, expense=expense, result=result,
+            )
+
+
 # ─── Expense Breakdown ───
 
 @dataclass
@@ -109,3 +208,40 @@ class CategoryExpense:
     name: str
     amount: float = 0.0
     percentage: float = 0.0
+
+
+@dataclass(eq=False)
+class ExpenseBreakdown:
+    """Despesas por categoria, em colunas (iterável como CategoryExpense)."""
+    names: np.ndarray = field(default_factory=_labels)
+    amounts: np.ndarray = field(default_factory=_floats)
+    percentages: np.ndarray = field(default_factory=_floats)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[CategoryExpense]:
+        for name, amount, percentage in zip(
+            self.names.tolist(), self.amounts.tolist(), self.percentages.tolist(),
+        ):
+            yield CategoryExpense(name=name, amount=amount, percentage=percentage)
+
+
+# ─── Bundle de métricas ───
+
+@dataclass
+class MetricsBundle:
+    """Todas as métricas do dashboard, calculadas em uma única passada."""
+    cash: dict
+    current_cash: float
+    projection: CashProjection
+    burn: BurnRate
+    runway: Runway
+    delinquency: Delinquency
+    net_pos: NetPosition
+    liquidity: dict
+    recv_aging: AgingSummary
+    pay_aging: AgingSummary
+    monthly: MonthlySeries
+    expenses: ExpenseBreakdown
+    cash_history: CashHistory
@@ -34,7 +34,7 @@ class InterTransaction:
 
 # ─── Conciliação ───
 
-@dataclass
+@dataclass(slots=True)
 class ReconciliationItem:
     """Um item da conciliação bancária."""
     # Dados do banco (Inter)
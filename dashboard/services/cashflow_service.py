@@ -7,54 +7,48 @@ Responsabilidades:
 - Aging de recebíveis e pagáveis
 """
 
+import functools
 from datetime import date, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
 from dashboard.models.financial_models import (
     CashProjection,
     CashHistory,
-    AgingBucket,
     AgingSummary,
-    MonthlyResult,
-    CategoryExpense,
+    MonthlySeries,
+    ExpenseBreakdown,
 )
 from dashboard.config import PROJECTION_DAYS, LOOKBACK_DAYS
+from dashboard.utils.date_utils import parse_iso_date
 
 
-# ─── Classificação de aging ───
+# ─── Status de títulos ───
 
-BUCKET_ORDER = ["Vencido", "0-30d", "31-60d", "60+d"]
+# Status já normalizados (.upper()), como nas colunas de titles_frame
+CLOSED_STATUSES = frozenset({"PAID", "CANCELLED", "CANCELED"})
+CANCELLED_STATUSES = frozenset({"CANCELLED", "CANCELED"})
 
 
-def _classify_aging_bucket(due_date_str: Optional[str], ref_date: date = None) -> str:
-    ref = ref_date or date.today()
-    if not due_date_str:
-        return "Vencido"
-    try:
-        dt = date.fromisoformat(due_date_str[:10])
-    except (ValueError, TypeError):
-        return "Vencido"
-    diff = (dt - ref).days
-    if diff < 0:
-        return "Vencido"
-    if diff <= 30:
-        return "0-30d"
-    if diff <= 60:
-        return "31-60d"
-    return "60+d"
+# ─── Classificação de aging ───
+
+BUCKET_ORDER = ["Vencido", "0-30d", "31-60d", "60+d"]
+# Limites inferiores (em dias até o vencimento) de 0-30d, 31-60d e 60+d
+_BUCKET_EDGES = np.array([0, 31, 61])
 
 
 def _is_open(item: dict) -> bool:
     """Verifica se um título está em aberto (não pago/cancelado)."""
-    status = (item.get("status") or "").upper()
-    return status not in ("PAID", "CANCELLED", "CANCELED")
+    return (item.get("status") or "").upper() not in CLOSED_STATUSES
 
 
 def _unpaid_amount(item: dict) -> float:
     """Retorna o valor não pago de um título."""
-    return float(item.get("nao_pago", item.get("total", 0)) or 0)
+    # Checagem de chave em vez de .get(k, .get(...)): o fallback só é lido se faltar
+    unpaid = item["nao_pago"] if "nao_pago" in item else item.get("total", 0)
+    return float(unpaid or 0)
 
 
 def _paid_amount(item: dict) -> float:
@@ -62,6 +56,103 @@ def _paid_amount(item: dict) -> float:
     return float(item.get("pago", 0) or 0)
 
 
+def _title_fields(items: list[dict]) -> Iterator[tuple[str, float, Optional[str]]]:
+    """(status normalizado, valor não pago, vencimento) de cada título, lidos uma vez."""
+    for item in items:
+        yield (
+            (item.get("status") or "").upper(),
+            _unpaid_amount(item),
+            item.get("data_vencimento"),
+        )
+
+
+def _flow_month_key(item: dict) -> Optional[str]:
+    """Mês (AAAA-MM) de competência do fluxo pago, com fallback no vencimento."""
+    if "data_competencia" in item:
+        dt_str = item["data_competencia"]
+    else:
+        dt_str = item.get("data_vencimento", "")
+    return dt_str[:7] if dt_str else None
+
+
+def _month_keys_since(start: date, end: date) -> list[str]:
+    """Meses de `start` até `end` (inclusive), do mais antigo ao mais recente."""
+    month_keys = []
+    current = start
+    while current <= end:
+        month_keys.append(current.strftime("%Y-%m"))
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    return month_keys
+
+
+@functools.lru_cache(maxsize=64)
+def _recent_month_keys(today: date, months: int) -> tuple[str, ...]:
+    """Últimos `months` meses a partir do atual, do mais recente ao mais antigo."""
+    month_keys = []
+    current = today.replace(day=1)
+    for _ in range(months):
+        month_keys.append(current.strftime("%Y-%m"))
+        current = (current - timedelta(days=1)).replace(day=1)
+    return tuple(month_keys)
+
+
+@functools.lru_cache(maxsize=256)
+def _month_label(mk: str) -> str:
+    mm = mk.split("-")[1]
+    return f"{MONTH_NAMES_PT.get(mm, mm)}/{mk[:4]}"
+
+
+# ─── Representação colunar (SoA) ───
+
+def titles_frame(items: list[dict], ref_date: date = None) -> pd.DataFrame:
+    """
+    Converte títulos (lista de dicts da API) para um DataFrame colunar.
+
+    Cada campo é extraído uma única vez, com as mesmas regras de fallback
+    dos helpers acima; as métricas passam a ser máscaras/groupby sobre colunas.
+    `days_to_due` é relativo a `ref_date` (hoje) e NaN sem vencimento válido.
+    O status vira categoria (poucos valores distintos) e as máscaras
+    `is_open`/`is_cancelled` são calculadas aqui, uma vez por lista.
+    """
+    ref = ref_date or date.today()
+    due_raw = [item.get("data_vencimento") for item in items]
+    due_dates = [parse_iso_date(v) for v in due_raw]
+    status = pd.Series(
+        [(item.get("status") or "").upper() for item in items], dtype="category",
+    )
+
+    return pd.DataFrame({
+        "status": status,
+        "is_open": ~status.isin(CLOSED_STATUSES),
+        "is_cancelled": status.isin(CANCELLED_STATUSES),
+        "unpaid": np.array(
+            [
+                (item["nao_pago"] if "nao_pago" in item else item.get("total", 0)) or 0
+                for item in items
+            ],
+            dtype=float,
+        ),
+        "paid": np.array([item.get("pago", 0) or 0 for item in items], dtype=float),
+        "total": np.array([item.get("total", 0) or 0 for item in items], dtype=float),
+        "days_to_due": np.array(
+            [(d - ref).days if d else np.nan for d in due_dates], dtype=float,
+        ),
+        "due_month": pd.Series([v[:7] if v else None for v in due_raw], dtype=object),
+        "flow_month": pd.Series([_flow_month_key(item) for item in items], dtype=object),
+        "category": pd.Series([_category_name(item) for item in items], dtype=object),
+    })
+
+
+def _sum_by(values: pd.Series, keys: pd.Series) -> dict:
+    """Soma `values` agrupando por `keys` (ordem de primeira ocorrência)."""
+    if values.empty:
+        return {}
+    return {k: float(v) for k, v in values.groupby(keys, sort=False).sum().items()}
+
+
 # ─── Cash Projection ───
 
 def build_cash_projection(
@@ -81,85 +172,83 @@ def build_cash_projection(
     """
     today = date.today()
 
-    # Mapa de fluxos por data
-    daily_inflows: dict[date, float] = {}
-    daily_outflows: dict[date, float] = {}
+    # Fluxos indexados por dia a partir de hoje
+    inflows = _due_flows(receivables, today, days)
+    outflows = _due_flows(payables, today, days)
+
+    return _project_balance(current_cash, inflows, outflows, today)
 
-    for item in receivables:
-        if not _is_open(item):
-            continue
-        amount = _unpaid_amount(item)
-        if amount <= 0:
-            continue
-        due_str = item.get("data_vencimento")
-        if not due_str:
-            continue
-        try:
-            due_date = date.fromisoformat(due_str[:10])
-        except (ValueError, TypeError):
-            continue
-        if due_date < today:
-            # Vencidos: assume recebimento hoje
-            daily_inflows[today] = daily_inflows.get(today, 0) + amount
-        else:
-            daily_inflows[due_date] = daily_inflows.get(due_date, 0) + amount
 
-    for item in payables:
+def _due_flows(items: list[dict], today: date, days: int) -> np.ndarray:
+    """Valor em aberto por dia de vencimento (índice 0 = hoje)."""
+    offsets = []
+    amounts = []
+    for item in items:
         if not _is_open(item):
             continue
         amount = _unpaid_amount(item)
         if amount <= 0:
             continue
-        due_str = item.get("data_vencimento")
-        if not due_str:
+        due_date = parse_iso_date(item.get("data_vencimento"))
+        if due_date is None:
             continue
-        try:
-            due_date = date.fromisoformat(due_str[:10])
-        except (ValueError, TypeError):
-            continue
-        if due_date < today:
-            # Vencidos: assume pagamento hoje
-            daily_outflows[today] = daily_outflows.get(today, 0) + amount
-        else:
-            daily_outflows[due_date] = daily_outflows.get(due_date, 0) + amount
-
-    # Projetar dia a dia
-    rows = []
-    balance = current_cash
-    min_balance = balance
-    min_balance_date = today
-    days_until_negative = None
-    balance_30d = balance
-    balance_60d = balance
+        offsets.append((due_date - today).days)
+        amounts.append(amount)
 
-    for i in range(days + 1):
-        d = today + timedelta(days=i)
-        balance += daily_inflows.get(d, 0)
-        balance -= daily_outflows.get(d, 0)
-
-        rows.append({"date": d, "balance": balance})
+    return _bin_by_day(
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(amounts, dtype=np.float64),
+        days,
+    )
 
-        if balance < min_balance:
-            min_balance = balance
-            min_balance_date = d
 
-        if balance < 0 and days_until_negative is None:
-            days_until_negative = i
+def _bin_by_day(offsets: np.ndarray, amounts: np.ndarray, days: int) -> np.ndarray:
+    """Soma os valores por dia; vencidos entram hoje, além do horizonte são ignorados."""
+    offsets = np.maximum(offsets, 0)
+    in_range = offsets <= days
+    return np.bincount(offsets[in_range], weights=amounts[in_range], minlength=days + 1)
 
-        if i == 30:
-            balance_30d = balance
-        if i == 60:
-            balance_60d = balance
 
-    df = pd.DataFrame(rows)
+def _project_balance(
+    current_cash: float,
+    inflows: np.ndarray,
+    outflows: np.ndarray,
+    today: date,
+) -> CashProjection:
+    """Acumula os fluxos diários sobre o caixa atual (dia 0 = hoje)."""
+    days = len(inflows) - 1
+
+    # Acumulado sequencial sobre [caixa, +in0, -out0, +in1, -out1, ...]:
+    # mesma ordem de soma (e arredondamento) do saldo dia a dia
+    steps = np.empty(2 * days + 3)
+    steps[0] = current_cash
+    steps[1::2] = inflows
+    steps[2::2] = -outflows
+    balance = np.add.accumulate(steps)[2::2]
+
+    # Mínimo parte do caixa atual (hoje) e só muda com saldo estritamente menor
+    min_idx = int(np.argmin(balance))
+    if balance[min_idx] < current_cash:
+        min_balance = float(balance[min_idx])
+        min_balance_date = today + timedelta(days=min_idx)
+    else:
+        min_balance = current_cash
+        min_balance_date = today
+
+    negative = np.flatnonzero(balance < 0)
+
+    df = pd.DataFrame({
+        "date": pd.date_range(today, periods=days + 1, freq="D").date,
+        "balance": balance,
+    })
 
     return CashProjection(
         daily=df,
         min_balance=min_balance,
         min_balance_date=min_balance_date,
-        days_until_negative=days_until_negative,
-        balance_30d=balance_30d,
-        balance_60d=balance_60d,
+        days_until_negative=int(negative[0]) if negative.size else None,
+        balance_30d=float(balance[30]) if days >= 30 else current_cash,
+        balance_60d=float(balance[60]) if days >= 60 else current_cash,
     )
 
 
@@ -167,24 +256,38 @@ def build_cash_projection(
 
 def compute_aging(items: list[dict], filter_open: bool = True) -> AgingSummary:
     """Agrupa títulos por bucket de aging."""
-    buckets = {b: AgingBucket(label=b) for b in BUCKET_ORDER}
+    today = date.today()
 
-    for item in items:
-        if filter_open and not _is_open(item):
+    amounts = []
+    offsets = []
+    for status, amount, due_str in _title_fields(items):
+        if filter_open and status in CLOSED_STATUSES:
             continue
-        amount = _unpaid_amount(item)
         if amount <= 0:
             continue
+        due_date = parse_iso_date(due_str)
+        amounts.append(amount)
+        offsets.append((due_date - today).days if due_date else -1)  # sem data = Vencido
+
+    return _aging_from_offsets(
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(amounts, dtype=np.float64),
+    )
 
-        bucket_key = _classify_aging_bucket(item.get("data_vencimento"))
-        if bucket_key in buckets:
-            buckets[bucket_key].amount += amount
-            buckets[bucket_key].count += 1
 
-    bucket_list = [buckets[b] for b in BUCKET_ORDER]
-    total = sum(b.amount for b in bucket_list)
+def _aging_from_offsets(offsets: np.ndarray, amounts: np.ndarray) -> AgingSummary:
+    """Classifica e soma em uma passada: bucket = nº de limites já alcançados."""
+    buckets = np.digitize(offsets, _BUCKET_EDGES)
+    # astype: sem títulos o bincount devolve inteiros
+    totals = np.bincount(buckets, weights=amounts, minlength=len(BUCKET_ORDER)).astype(np.float64)
+    counts = np.bincount(buckets, minlength=len(BUCKET_ORDER))
 
-    return AgingSummary(buckets=bucket_list, total=total)
+    return AgingSummary(
+        labels=np.asarray(BUCKET_ORDER, dtype=str),
+        amounts=totals,
+        counts=counts.astype(np.int64),
+        total=sum(totals.tolist()),
+    )
 
 
 # ─── Revenue vs Expense mensal ───
@@ -200,109 +303,107 @@ def compute_monthly_revenue_expenses(
     receivables: list[dict],
     payables: list[dict],
     months: int = 6,
-) -> list[MonthlyResult]:
+) -> MonthlySeries:
     """Agrega receita (pago) e despesa (pago) por mês."""
-    today = date.today()
-    start = (today.replace(day=1) - timedelta(days=months * 30)).replace(day=1)
+    month_keys = _monthly_window(date.today(), months)
 
-    # Gerar labels de meses
-    month_keys = []
-    current = start
-    while current <= today:
-        month_keys.append(current.strftime("%Y-%m"))
-        if current.month == 12:
-            current = current.replace(year=current.year + 1, month=1)
-        else:
-            current = current.replace(month=current.month + 1)
+    revenue = _paid_by_month(receivables)
+    expense = _paid_by_month(payables)
+
+    return _monthly_results(
+        month_keys,
+        {mk: revenue.get(mk, 0.0) for mk in month_keys},
+        {mk: expense.get(mk, 0.0) for mk in month_keys},
+    )
 
-    revenue = {m: 0.0 for m in month_keys}
-    expense = {m: 0.0 for m in month_keys}
 
-    for item in receivables:
-        pago = _paid_amount(item)
-        if pago <= 0:
-            continue
-        dt_str = item.get("data_competencia", item.get("data_vencimento", ""))
-        if dt_str:
-            mk = dt_str[:7]
-            if mk in revenue:
-                revenue[mk] += pago
-
-    for item in payables:
-        pago = _paid_amount(item)
-        if pago <= 0:
-            continue
-        dt_str = item.get("data_competencia", item.get("data_vencimento", ""))
-        if dt_str:
-            mk = dt_str[:7]
-            if mk in expense:
-                expense[mk] += pago
-
-    results = []
-    for mk in month_keys:
-        mm = mk.split("-")[1]
-        label = f"{MONTH_NAMES_PT.get(mm, mm)}/{mk[:4]}"
-        r = revenue[mk]
-        d = expense[mk]
-        results.append(MonthlyResult(
-            month_label=label,
-            month_key=mk,
-            revenue=r,
-            expense=d,
-            result=r - d,
-        ))
-
-    return results
+def _paid_by_month(items: list[dict]) -> dict[str, float]:
+    """Soma do valor pago (> 0) por mês de fluxo, via groupby."""
+    if not items:
+        return {}
+    flows = pd.DataFrame({
+        "paid": np.array([_paid_amount(item) for item in items], dtype=float),
+        "month": pd.Series([_flow_month_key(item) for item in items], dtype=object),
+    })
+    flows = flows[(flows["paid"] > 0) & flows["month"].notna()]
+    return _sum_by(flows["paid"], flows["month"])
+
+
+@functools.lru_cache(maxsize=64)
+def _monthly_window(today: date, months: int) -> tuple[str, ...]:
+    """Meses exibidos no gráfico mensal: `months` meses atrás até o atual."""
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return tuple(_month_keys_since(date(year, month + 1, 1), today))
+
+
+def _monthly_results(
+    month_keys: tuple[str, ...],
+    revenue: dict[str, float],
+    expense: dict[str, float],
+) -> MonthlySeries:
+    revenues = np.asarray([revenue[mk] for mk in month_keys], dtype=np.float64)
+    expenses = np.asarray([expense[mk] for mk in month_keys], dtype=np.float64)
+
+    return MonthlySeries(
+        labels=np.asarray([_month_label(mk) for mk in month_keys], dtype=str),
+        keys=np.asarray(month_keys, dtype=str),
+        revenue=revenues,
+        expense=expenses,
+        result=revenues - expenses,
+    )
 
 
 # ─── Expense Breakdown ───
 
-def compute_expense_breakdown(payables: list[dict], top_n: int = 8) -> list[CategoryExpense]:
+def compute_expense_breakdown(payables: list[dict], top_n: int = 8) -> ExpenseBreakdown:
     """Despesas por categoria do mês corrente."""
+    if not payables:
+        return ExpenseBreakdown()
+
     today = date.today()
     current_month = today.strftime("%Y-%m")
 
-    cat_totals: dict[str, float] = {}
+    dues = [item.get("data_vencimento") for item in payables]
+    expenses = pd.DataFrame({
+        "total": np.array([item.get("total", 0) or 0 for item in payables], dtype=float),
+        "due_month": pd.Series([v[:7] if v else None for v in dues], dtype=object),
+        "category": pd.Series([_category_name(item) for item in payables], dtype=object),
+    })
 
-    for item in payables:
-        valor = float(item.get("total", 0) or 0)
-        if valor <= 0:
-            continue
+    # Filtrar só mês atual pela data de vencimento
+    month_pay = expenses[(expenses["total"] > 0) & (expenses["due_month"] == current_month)]
 
-        # Filtrar só mês atual pela data de vencimento
-        dt_str = item.get("data_vencimento", "")
-        if not dt_str or dt_str[:7] != current_month:
-            continue
+    return _rank_categories(_sum_by(month_pay["total"], month_pay["category"]), top_n)
+
+
+def _category_name(item: dict) -> str:
+    cats = item.get("categorias", [])
+    return cats[0].get("nome", "Sem categoria") if cats else "Sem categoria"
 
-        cats = item.get("categorias", [])
-        cat_name = cats[0].get("nome", "Sem categoria") if cats else "Sem categoria"
-        cat_totals[cat_name] = cat_totals.get(cat_name, 0) + valor
 
+def _rank_categories(cat_totals: dict[str, float], top_n: int) -> ExpenseBreakdown:
+    """Top N categorias por valor, agrupando o restante em "Outros"."""
     if not cat_totals:
-        return []
+        return ExpenseBreakdown()
 
     sorted_cats = sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)
     top = sorted_cats[:top_n]
     others_sum = sum(v for _, v in sorted_cats[top_n:])
 
     total = sum(v for _, v in sorted_cats)
-    results = []
-
-    for name, val in top:
-        results.append(CategoryExpense(
-            name=name,
-            amount=val,
-            percentage=(val / total * 100) if total > 0 else 0,
-        ))
 
+    names = [name for name, _ in top]
+    amounts = [val for _, val in top]
     if others_sum > 0:
-        results.append(CategoryExpense(
-            name="Outros",
-            amount=others_sum,
-            percentage=(others_sum / total * 100) if total > 0 else 0,
-        ))
-
-    return results
+        names.append("Outros")
+        amounts.append(others_sum)
+
+    amounts = np.asarray(amounts, dtype=np.float64)
+    return ExpenseBreakdown(
+        names=np.asarray(names, dtype=str),
+        amounts=amounts,
+        percentages=amounts / total * 100 if total > 0 else np.zeros_like(amounts),
+    )
 
 
 # ─── Cash History (estimado) ───
@@ -322,59 +423,46 @@ def build_cash_history(
     today = date.today()
 
     # Agregar fluxos pagos por mês
-    monthly_inflows: dict[str, float] = {}
-    monthly_outflows: dict[str, float] = {}
+    monthly_inflows = _paid_by_month(receivables)
+    monthly_outflows = _paid_by_month(payables)
 
-    for item in receivables:
-        pago = _paid_amount(item)
-        if pago <= 0:
-            continue
-        dt_str = item.get("data_competencia", item.get("data_vencimento", ""))
-        if dt_str:
-            mk = dt_str[:7]
-            monthly_inflows[mk] = monthly_inflows.get(mk, 0) + pago
-
-    for item in payables:
-        pago = _paid_amount(item)
-        if pago <= 0:
-            continue
-        dt_str = item.get("data_competencia", item.get("data_vencimento", ""))
-        if dt_str:
-            mk = dt_str[:7]
-            monthly_outflows[mk] = monthly_outflows.get(mk, 0) + pago
-
-    # Gerar meses (do mais recente ao mais antigo)
-    month_keys = []
-    current = today.replace(day=1)
-    for _ in range(months):
-        month_keys.append(current.strftime("%Y-%m"))
-        current = (current - timedelta(days=1)).replace(day=1)
-
-    month_keys.reverse()  # mais antigo primeiro
-
-    # Calcular de trás para frente
-    rows = []
-    balance = current_cash
-    current_month = today.strftime("%Y-%m")
+    return _history_from_flows(
+        monthly_inflows, monthly_outflows, current_cash, months, today,
+    )
 
-    # Do mês atual para trás: reverter fluxos
-    reversed_keys = list(reversed(month_keys))
-    balances = {}
 
-    for i, mk in enumerate(reversed_keys):
-        if i == 0:
-            balances[mk] = balance
-        else:
-            # Reverter: subtrair inflows e somar outflows do mês seguinte
-            prev_mk = reversed_keys[i - 1]
-            inflow = monthly_inflows.get(prev_mk, 0)
-            outflow = monthly_outflows.get(prev_mk, 0)
-            balance = balance - inflow + outflow
-            balances[mk] = balance
-
-    for mk in month_keys:
-        mm = mk.split("-")[1]
-        label = f"{MONTH_NAMES_PT.get(mm, mm)}/{mk[:4]}"
-        rows.append({"month": label, "month_key": mk, "balance": balances.get(mk, 0)})
-
-    return CashHistory(monthly=pd.DataFrame(rows))
+def _history_from_flows(
+    monthly_inflows: dict[str, float],
+    monthly_outflows: dict[str, float],
+    current_cash: float,
+    months: int,
+    today: date,
+) -> CashHistory:
+    # Gerar meses (do mais recente ao mais antigo)
+    reversed_keys = _recent_month_keys(today, months)
+    if not reversed_keys:
+        return CashHistory()
+
+    if not monthly_inflows and not monthly_outflows:
+        # Sem fluxos pagos: saldo constante, sem reindex/acumulado
+        balances = np.full(len(reversed_keys), current_cash, dtype=np.float64)
+    else:
+        # Do mês atual para trás, cada mês reverte os fluxos do mês seguinte:
+        # acumulado sequencial sobre [caixa, -in0, +out0, -in1, +out1, ...]
+        later = list(reversed_keys[:-1])
+        inflows = pd.Series(monthly_inflows, dtype=np.float64).reindex(later, fill_value=0.0)
+        outflows = pd.Series(monthly_outflows, dtype=np.float64).reindex(later, fill_value=0.0)
+
+        steps = np.empty(2 * len(later) + 1)
+        steps[0] = current_cash
+        steps[1::2] = -inflows.to_numpy()
+        steps[2::2] = outflows.to_numpy()
+        balances = np.add.accumulate(steps)[0::2]
+
+    # Mais antigo primeiro
+    keys = reversed_keys[::-1]
+    return CashHistory(
+        labels=np.asarray([_month_label(mk) for mk in keys], dtype=str),
+        keys=np.asarray(keys, dtype=str),
+        balances=balances[::-1].copy(),
+    )
@@ -7,17 +7,40 @@ Responsabilidades:
 - Inadimplência (Delinquency)
 - Posição Líquida (Net Position)
 - Indicadores de liquidez
+- Cálculo fundido de todas as métricas (compute_all)
 """
 
-from datetime import date, timedelta
+from datetime import date
+
+import numpy as np
+import pandas as pd
 
 from dashboard.models.financial_models import (
+    AgingSummary,
     BurnRate,
     Runway,
     Delinquency,
     NetPosition,
+    MetricsBundle,
+)
+from dashboard.services.cashflow_service import (
+    CANCELLED_STATUSES,
+    CLOSED_STATUSES,
+    _aging_from_offsets,
+    _bin_by_day,
+    _flow_month_key,
+    _history_from_flows,
+    _monthly_results,
+    _monthly_window,
+    _paid_amount,
+    _project_balance,
+    _rank_categories,
+    _recent_month_keys,
+    _sum_by,
+    _title_fields,
 )
-from dashboard.config import BURN_RATE_MONTHS
+from dashboard.config import BURN_RATE_MONTHS, PROJECTION_DAYS
+from dashboard.utils.date_utils import parse_iso_date
 
 
 # ─── Burn Rate ───
@@ -33,28 +56,21 @@ def calculate_burn_rate(
     """
     today = date.today()
 
-    # Gerar meses
-    month_keys = []
-    current = today.replace(day=1)
-    for _ in range(months):
-        month_keys.append(current.strftime("%Y-%m"))
-        current = (current - timedelta(days=1)).replace(day=1)
-
-    monthly_expenses: dict[str, float] = {mk: 0.0 for mk in month_keys}
+    monthly_expenses: dict[str, float] = {mk: 0.0 for mk in _recent_month_keys(today, months)}
 
     for item in payables:
-        pago = float(item.get("pago", 0) or 0)
+        pago = _paid_amount(item)
         if pago <= 0:
             continue
 
-        dt_str = item.get("data_competencia", item.get("data_vencimento", ""))
-        if not dt_str:
-            continue
-
-        mk = dt_str[:7]
+        mk = _flow_month_key(item)
         if mk in monthly_expenses:
             monthly_expenses[mk] += pago
 
+    return _burn_from_monthly(monthly_expenses, today)
+
+
+def _burn_from_monthly(monthly_expenses: dict[str, float], today: date) -> BurnRate:
     # Calcular média (ignorar meses com 0 se forem futuros/sem dados)
     current_month = today.strftime("%Y-%m")
     active_months = [
@@ -114,29 +130,31 @@ def calculate_delinquency(receivables: list[dict]) -> Delinquency:
     overdue_count = 0
     total_count = 0
 
-    for item in receivables:
-        status = (item.get("status") or "").upper()
-        if status in ("CANCELLED", "CANCELED"):
+    for status, amount, due_str in _title_fields(receivables):
+        if status in CANCELLED_STATUSES:
             continue
 
-        amount = float(item.get("nao_pago", item.get("total", 0)) or 0)
         if amount <= 0:
             continue
 
         total_receivable += amount
         total_count += 1
 
-        if status not in ("PAID",):
-            due_str = item.get("data_vencimento", "")
-            if due_str:
-                try:
-                    due_date = date.fromisoformat(due_str[:10])
-                    if due_date < today:
-                        overdue_receivable += amount
-                        overdue_count += 1
-                except (ValueError, TypeError):
-                    pass
+        if status != "PAID":
+            due_date = parse_iso_date(due_str)
+            if due_date is not None and due_date < today:
+                overdue_receivable += amount
+                overdue_count += 1
+
+    return _delinquency(total_receivable, overdue_receivable, overdue_count, total_count)
+
 
+def _delinquency(
+    total_receivable: float,
+    overdue_receivable: float,
+    overdue_count: int,
+    total_count: int,
+) -> Delinquency:
     rate = (overdue_receivable / total_receivable * 100) if total_receivable > 0 else 0
 
     return Delinquency(
@@ -158,18 +176,16 @@ def calculate_net_position(
     Calcula posição líquida: recebíveis pendentes − pagáveis pendentes.
     """
     recv_total = 0.0
-    for item in receivables:
-        status = (item.get("status") or "").upper()
-        if status in ("PAID", "CANCELLED", "CANCELED"):
+    for status, amount, _ in _title_fields(receivables):
+        if status in CLOSED_STATUSES:
             continue
-        recv_total += float(item.get("nao_pago", item.get("total", 0)) or 0)
+        recv_total += amount
 
     pay_total = 0.0
-    for item in payables:
-        status = (item.get("status") or "").upper()
-        if status in ("PAID", "CANCELLED", "CANCELED"):
+    for status, amount, _ in _title_fields(payables):
+        if status in CLOSED_STATUSES:
             continue
-        pay_total += float(item.get("nao_pago", item.get("total", 0)) or 0)
+        pay_total += amount
 
     return NetPosition(
         receivable_total=recv_total,
@@ -201,3 +217,122 @@ def calculate_liquidity(
         "current_ratio": current_assets / total_pay if total_pay > 0 else 0,
         "working_capital": current_assets - total_pay,
     }
+
+
+# ─── Cálculo fundido ───
+
+def compute_all(
+    receivables: pd.DataFrame,
+    payables: pd.DataFrame,
+    cash: dict,
+) -> MetricsBundle:
+    """
+    Calcula todas as métricas do dashboard sobre os títulos em formato colunar.
+
+    Recebe os DataFrames de titles_frame (uma conversão por lista) e
+    resolve aging, projeção, burn, inadimplência, posição líquida,
+    receita/despesa mensal, categorias e histórico com máscaras e groupby,
+    com os mesmos critérios das funções individuais (parâmetros padrão).
+    """
+    today = date.today()
+    current_month = today.strftime("%Y-%m")
+    current_cash = cash["total"]
+
+    # Máscaras de status já prontas em titles_frame
+    recv_open = receivables["is_open"]
+    pay_open = payables["is_open"]
+    recv_unpaid = receivables["unpaid"] > 0
+    recv_pending = recv_open & recv_unpaid
+    pay_pending = pay_open & (payables["unpaid"] > 0)
+
+    # Aging
+    recv_aging = _aging_from_frame(receivables[recv_pending])
+    pay_aging = _aging_from_frame(payables[pay_pending])
+
+    # Projeção: vencidos entram hoje
+    projection = _project_balance(
+        current_cash,
+        _daily_flows(receivables[recv_pending], PROJECTION_DAYS),
+        _daily_flows(payables[pay_pending], PROJECTION_DAYS),
+        today,
+    )
+
+    # Fluxos pagos por mês (receita/despesa, burn e histórico)
+    recv_paid = receivables[(receivables["paid"] > 0) & receivables["flow_month"].notna()]
+    pay_paid = payables[(payables["paid"] > 0) & payables["flow_month"].notna()]
+    monthly_inflows = _sum_by(recv_paid["paid"], recv_paid["flow_month"])
+    monthly_outflows = _sum_by(pay_paid["paid"], pay_paid["flow_month"])
+
+    month_keys = _monthly_window(today, 6)
+    monthly = _monthly_results(
+        month_keys,
+        {mk: monthly_inflows.get(mk, 0.0) for mk in month_keys},
+        {mk: monthly_outflows.get(mk, 0.0) for mk in month_keys},
+    )
+
+    burn = _burn_from_monthly(
+        {mk: monthly_outflows.get(mk, 0.0) for mk in _recent_month_keys(today, BURN_RATE_MONTHS)},
+        today,
+    )
+
+    # Inadimplência: todos os não cancelados com saldo; vencidos só em aberto
+    recv_active = ~receivables["is_cancelled"] & recv_unpaid
+    overdue = recv_pending & (receivables["days_to_due"] < 0)
+    delinquency = _delinquency(
+        float(receivables.loc[recv_active, "unpaid"].sum()),
+        float(receivables.loc[overdue, "unpaid"].sum()),
+        int(overdue.sum()),
+        int(recv_active.sum()),
+    )
+
+    # Posição líquida
+    recv_total = float(receivables.loc[recv_open, "unpaid"].sum())
+    pay_total = float(payables.loc[pay_open, "unpaid"].sum())
+
+    # Despesas por categoria: valor total com vencimento no mês atual
+    month_pay = payables[(payables["total"] > 0) & (payables["due_month"] == current_month)]
+    expenses = _rank_categories(_sum_by(month_pay["total"], month_pay["category"]), top_n=8)
+
+    return MetricsBundle(
+        cash=cash,
+        current_cash=current_cash,
+        projection=projection,
+        burn=burn,
+        runway=calculate_runway(current_cash, burn.monthly_average),
+        delinquency=delinquency,
+        net_pos=NetPosition(
+            receivable_total=recv_total,
+            payable_total=pay_total,
+            net_position=recv_total - pay_total,
+        ),
+        liquidity=calculate_liquidity(
+            current_cash,
+            recv_aging.amounts_by_label,
+            pay_aging.amounts_by_label,
+        ),
+        recv_aging=recv_aging,
+        pay_aging=pay_aging,
+        monthly=monthly,
+        expenses=expenses,
+        cash_history=_history_from_flows(
+            monthly_inflows, monthly_outflows, current_cash, 12, today,
+        ),
+    )
+
+
+def _aging_from_frame(pending: pd.DataFrame) -> AgingSummary:
+    """Aging sobre as colunas já preparadas (sem data = Vencido)."""
+    return _aging_from_offsets(
+        pending["days_to_due"].fillna(-1).to_numpy(dtype=np.int64),
+        pending["unpaid"].to_numpy(dtype=np.float64),
+    )
+
+
+def _daily_flows(pending: pd.DataFrame, days: int) -> np.ndarray:
+    """Soma por dia de vencimento (índice 0 = hoje); vencidos são antecipados para hoje."""
+    dated = pending[pending["days_to_due"].notna()]
+    return _bin_by_day(
+        dated["days_to_due"].to_numpy(dtype=np.int64),
+        dated["unpaid"].to_numpy(dtype=np.float64),
+        days,
+    )
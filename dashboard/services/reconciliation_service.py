@@ -5,15 +5,17 @@ Cruza transações do extrato do Banco Inter com contas a pagar/receber
 do Conta Azul para identificar itens conciliados e pendentes.
 
 Algoritmo de matching:
-- Valor exato (tolerância R$0.01)
-- Janela de data configurável (padrão: ±3 dias)
+- Valor em centavos inteiros (tolerância R$0.01 = 1 centavo)
+- Janela de data configurável (padrão: ±3 dias), via bisect por data
 - Créditos → recebíveis pagos
 - Débitos → pagáveis pagos
 """
 
+from bisect import bisect_left
 from datetime import date, timedelta
 
 from dashboard.config import RECONCILIATION_DATE_TOLERANCE
+from dashboard.utils.date_utils import parse_iso_date
 from dashboard.models.inter_models import (
     InterTransaction,
     ReconciliationItem,
@@ -24,24 +26,21 @@ from dashboard.models.inter_models import (
 def _paid_date(item: dict) -> date | None:
     """Extrai data de pagamento/competência de um item do Conta Azul."""
     for field in ("data_pagamento", "data_competencia", "data_vencimento"):
-        dt_str = item.get(field)
-        if dt_str:
-            try:
-                return date.fromisoformat(dt_str[:10])
-            except (ValueError, TypeError):
-                continue
+        parsed = parse_iso_date(item.get(field))
+        if parsed is not None:
+            return parsed
     return None
 
 
 def _paid_amount(item: dict) -> float:
     """Retorna valor pago de um item do Conta Azul."""
-    return float(item.get("pago", item.get("total", 0)) or 0)
+    paid = item["pago"] if "pago" in item else item.get("total", 0)
+    return float(paid or 0)
 
 
 def _is_paid(item: dict) -> bool:
     """Verifica se um item do Conta Azul foi pago."""
-    status = (item.get("status") or "").upper()
-    return status == "PAID"
+    return (item.get("status") or "").upper() == "PAID"
 
 
 def _item_description(item: dict) -> str:
@@ -54,6 +53,77 @@ def _item_description(item: dict) -> str:
     )
 
 
+def _amount_cents(amount: float) -> int:
+    """Valor em centavos inteiros: comparação e soma sem erro de ponto flutuante."""
+    return int(round(amount * 100))
+
+
+def _erp_entries(candidates: list[dict]) -> list[tuple[str, float, date | None, dict]]:
+    """Extrai (id, valor, data, item) de cada título pago uma única vez."""
+    return [
+        (item.get("id", str(i)), _paid_amount(item), _paid_date(item), item)
+        for i, item in enumerate(candidates)
+    ]
+
+
+def _index_by_cents(entries: list[tuple]) -> tuple[dict, dict]:
+    """
+    Índices centavos → títulos com esse valor.
+
+    Datados: listas de (dia ordinal, posição) ordenadas por data, para recortar
+    a janela de tolerância com bisect. Sem data: posições, casam com qualquer data.
+    """
+    dated: dict[int, list[tuple[int, int]]] = {}
+    undated: dict[int, list[int]] = {}
+    for pos, (_, amount, erp_date, _) in enumerate(entries):
+        cents = _amount_cents(amount)
+        if erp_date:
+            dated.setdefault(cents, []).append((erp_date.toordinal(), pos))
+        else:
+            undated.setdefault(cents, []).append(pos)
+
+    for bucket in dated.values():
+        bucket.sort()
+    return dated, undated
+
+
+def _first_match(
+    tx: InterTransaction,
+    entries: list[tuple],
+    index: tuple[dict, dict],
+    matched_set: set,
+    tolerance_cents: int,
+    tolerance_days: int,
+) -> int | None:
+    """
+    Posição do primeiro título (na ordem original) que casa com a transação.
+
+    Os buckets a até `tolerance_cents` do valor da transação já satisfazem
+    o critério de valor e o recorte por bisect, o de data; resta o id.
+    """
+    dated, undated = index
+    cents = _amount_cents(tx.valor)
+    tx_day = tx.data.toordinal()
+    best = None
+    for bucket in range(cents - tolerance_cents, cents + tolerance_cents + 1):
+        candidates = dated.get(bucket)
+        if candidates:
+            # (dia,) < (dia, pos): recorta [tx - tol, tx + tol] em dias
+            lo = bisect_left(candidates, (tx_day - tolerance_days,))
+            hi = bisect_left(candidates, (tx_day + tolerance_days + 1,))
+            for _, pos in candidates[lo:hi]:
+                if (best is None or pos < best) and entries[pos][0] not in matched_set:
+                    best = pos
+
+        for pos in undated.get(bucket, ()):
+            if best is not None and pos >= best:
+                break
+            if entries[pos][0] not in matched_set:
+                best = pos
+                break
+    return best
+
+
 def reconcile(
     transactions: list[InterTransaction],
     receivables: list[dict],
@@ -69,7 +139,7 @@ def reconcile(
         receivables: Contas a receber do Conta Azul
         payables: Contas a pagar do Conta Azul
         tolerance_days: Janela de tolerância em dias para matching
-        value_tolerance: Tolerância de valor para matching (R$)
+        value_tolerance: Tolerância de valor para matching (R$, comparada em centavos)
 
     Returns:
         ReconciliationResult com itens conciliados e não conciliados
@@ -78,6 +148,13 @@ def reconcile(
     paid_receivables = [r for r in receivables if _is_paid(r)]
     paid_payables = [p for p in payables if _is_paid(p)]
 
+    # Títulos indexados por valor em centavos (lookup O(1) por transação)
+    recv_entries = _erp_entries(paid_receivables)
+    pay_entries = _erp_entries(paid_payables)
+    recv_index = _index_by_cents(recv_entries)
+    pay_index = _index_by_cents(pay_entries)
+    tolerance_cents = _amount_cents(value_tolerance)
+
     # Rastrear quais itens do ERP já foram matched
     matched_recv_ids = set()
     matched_pay_ids = set()
@@ -85,42 +162,27 @@ def reconcile(
     items = []
     conciliados = 0
     so_banco = 0
-    valor_conciliado = 0.0
-    valor_so_banco = 0.0
+    # Totais acumulados em centavos
+    cents_conciliado = 0
+    cents_so_banco = 0
 
     for tx in transactions:
-        match_found = False
-
         # Créditos → buscar em recebíveis pagos
         if tx.tipo == "CREDITO":
-            candidates = paid_receivables
+            entries, index = recv_entries, recv_index
             matched_set = matched_recv_ids
         else:
             # Débitos → buscar em pagáveis pagos
-            candidates = paid_payables
+            entries, index = pay_entries, pay_index
             matched_set = matched_pay_ids
 
-        for i, item in enumerate(candidates):
-            item_id = item.get("id", str(i))
-            if item_id in matched_set:
-                continue
+        pos = _first_match(
+            tx, entries, index, matched_set, tolerance_cents, tolerance_days,
+        )
 
-            erp_amount = _paid_amount(item)
-            erp_date = _paid_date(item)
-
-            # Match por valor
-            if abs(erp_amount - tx.valor) > value_tolerance:
-                continue
-
-            # Match por data
-            if erp_date:
-                diff = abs((tx.data - erp_date).days)
-                if diff > tolerance_days:
-                    continue
-
-            # Match encontrado
+        if pos is not None:
+            item_id, erp_amount, erp_date, item = entries[pos]
             matched_set.add(item_id)
-            match_found = True
 
             items.append(ReconciliationItem(
                 banco_data=tx.data,
@@ -135,10 +197,8 @@ def reconcile(
                 status="CONCILIADO",
             ))
             conciliados += 1
-            valor_conciliado += tx.valor
-            break
-
-        if not match_found:
+            cents_conciliado += _amount_cents(tx.valor)
+        else:
             items.append(ReconciliationItem(
                 banco_data=tx.data,
                 banco_descricao=tx.descricao,
@@ -147,30 +207,31 @@ def reconcile(
                 status="SO_BANCO",
             ))
             so_banco += 1
-            valor_so_banco += tx.valor
+            cents_so_banco += _amount_cents(tx.valor)
 
     # Itens do ERP sem match no banco
     so_erp = 0
-    valor_so_erp = 0.0
-
-    for source, candidates, matched_set in [
-        ("recebível", paid_receivables, matched_recv_ids),
-        ("pagável", paid_payables, matched_pay_ids),
+    cents_so_erp = 0
+
+    # Período do extrato (± tolerância), calculado uma vez
+    if transactions:
+        tx_dates = [tx.data for tx in transactions]
+        min_date = min(tx_dates) - timedelta(days=tolerance_days)
+        max_date = max(tx_dates) + timedelta(days=tolerance_days)
+    else:
+        min_date = max_date = None
+
+    for source, entries, matched_set in [
+        ("recebível", recv_entries, matched_recv_ids),
+        ("pagável", pay_entries, matched_pay_ids),
     ]:
-        for i, item in enumerate(candidates):
-            item_id = item.get("id", str(i))
+        for item_id, erp_amount, erp_date, item in entries:
             if item_id in matched_set:
                 continue
 
-            erp_amount = _paid_amount(item)
-            erp_date = _paid_date(item)
-
             # Filtrar só itens dentro do período do extrato
-            if transactions and erp_date:
-                min_date = min(tx.data for tx in transactions) - timedelta(days=tolerance_days)
-                max_date = max(tx.data for tx in transactions) + timedelta(days=tolerance_days)
-                if erp_date < min_date or erp_date > max_date:
-                    continue
+            if min_date is not None and erp_date and (erp_date < min_date or erp_date > max_date):
+                continue
 
             items.append(ReconciliationItem(
                 erp_descricao=_item_description(item),
@@ -181,7 +242,7 @@ def reconcile(
                 status="SO_ERP",
             ))
             so_erp += 1
-            valor_so_erp += erp_amount
+            cents_so_erp += _amount_cents(erp_amount)
 
     return ReconciliationResult(
         items=items,
@@ -190,7 +251,7 @@ def reconcile(
         conciliados=conciliados,
         so_banco=so_banco,
         so_erp=so_erp,
-        valor_conciliado=valor_conciliado,
-        valor_so_banco=valor_so_banco,
-        valor_so_erp=valor_so_erp,
+        valor_conciliado=cents_conciliado / 100,
+        valor_so_banco=cents_so_banco / 100,
+        valor_so_erp=cents_so_erp / 100,
     )
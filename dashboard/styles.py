@@ -3,6 +3,8 @@ Design system: Dark Fintech theme.
 Tokens de cor, CSS customizado e template Plotly.
 """
 
+import string
+
 # ─── Color Tokens ───
 
 COLORS = {
@@ -49,6 +51,10 @@ AGING_COLORS = {
     "60+d": COLORS["text_muted"],
 }
 
+# Paleta na ordem canônica dos buckets (mesma ordem de BUCKET_ORDER)
+AGING_BUCKET_ORDER = list(AGING_COLORS)
+AGING_COLOR_SEQUENCE = list(AGING_COLORS.values())
+
 
 # ─── Plotly Template ───
 
@@ -90,14 +96,43 @@ PLOTLY_TEMPLATE = {
     }
 }
 
+PLOTLY_TEMPLATE_NAME = "fintech_dark"
+
+
+def ensure_plotly_template() -> str:
+    """
+    Registra PLOTLY_TEMPLATE como go.layout.Template (uma vez por processo).
+
+    As figuras referenciam o nome e o plotly não revalida o dict a cada
+    update_layout. Parte do template padrão, como fazia a mescla de
+    update_layout(template=dict), sem mudar o visual. O plotly só é
+    importado aqui, na primeira construção de gráfico.
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    if PLOTLY_TEMPLATE_NAME not in pio.templates:
+        template = go.layout.Template(pio.templates[pio.templates.default])
+        template.update(PLOTLY_TEMPLATE)
+        pio.templates[PLOTLY_TEMPLATE_NAME] = template
+    return PLOTLY_TEMPLATE_NAME
+
+
+# Config do plotly.js: sem modebar nem resize responsivo (o Streamlit já
+# dimensiona pelo container); gráficos só de leitura dispensam hover/eventos
+PLOTLY_CONFIG = {"displayModeBar": False, "responsive": False}
+PLOTLY_STATIC_CONFIG = {**PLOTLY_CONFIG, "staticPlot": True}
+
 
 # ─── Custom CSS ───
 
-CUSTOM_CSS = """
+# Fontes via <link> (preconnect + stylesheet) em vez de @import dentro do
+# <style>, que só começa a baixar depois de o bloco ser interpretado
+_CSS_TEMPLATE = string.Template("""
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500;600&display=swap">
 <style>
-/* ── Fonts ── */
-@import url('https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500;600&display=swap');
-
 /* ── Global ── */
 html, body, [data-testid="stAppViewContainer"] {
     font-family: 'Plus Jakarta Sans', sans-serif !important;
@@ -111,21 +146,21 @@ html, body, [data-testid="stAppViewContainer"] {
 
 /* ── Metric Cards ── */
 [data-testid="stMetric"] {
-    background: """ + COLORS["bg_surface"] + """;
-    border: 1px solid """ + COLORS["border"] + """;
+    background: ${bg_surface};
+    border: 1px solid ${border};
     border-radius: 12px;
     padding: 20px 16px;
     transition: border-color 0.2s ease;
 }
 [data-testid="stMetric"]:hover {
-    border-color: """ + COLORS["border_light"] + """;
+    border-color: ${border_light};
 }
 
 [data-testid="stMetricLabel"] {
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-size: 0.75rem !important;
     font-weight: 600 !important;
-    color: """ + COLORS["text_muted"] + """ !important;
+    color: ${text_muted} !important;
     text-transform: uppercase !important;
     letter-spacing: 0.05em !important;
 }
@@ -137,7 +172,7 @@ html, body, [data-testid="stAppViewContainer"] {
     font-family: 'JetBrains Mono', monospace !important;
     font-size: 1.35rem !important;
     font-weight: 600 !important;
-    color: """ + COLORS["text_primary"] + """ !important;
+    color: ${text_primary} !important;
 }
 
 [data-testid="stMetricDelta"] {
@@ -147,8 +182,8 @@ html, body, [data-testid="stAppViewContainer"] {
 
 /* ── Sidebar ── */
 [data-testid="stSidebar"] {
-    background: """ + COLORS["bg_surface"] + """ !important;
-    border-right: 1px solid """ + COLORS["border"] + """ !important;
+    background: ${bg_surface} !important;
+    border-right: 1px solid ${border} !important;
 }
 [data-testid="stSidebar"] [data-testid="stMarkdownContainer"] p {
     font-size: 0.85rem;
@@ -157,14 +192,14 @@ html, body, [data-testid="stAppViewContainer"] {
 /* ── Tabs ── */
 .stTabs [data-baseweb="tab-list"] {
     gap: 4px;
-    background: """ + COLORS["bg_surface"] + """;
+    background: ${bg_surface};
     border-radius: 10px;
     padding: 4px;
-    border: 1px solid """ + COLORS["border"] + """;
+    border: 1px solid ${border};
 }
 .stTabs [data-baseweb="tab"] {
     border-radius: 8px !important;
-    color: """ + COLORS["text_muted"] + """ !important;
+    color: ${text_muted} !important;
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-weight: 500 !important;
     font-size: 0.85rem !important;
@@ -172,27 +207,27 @@ html, body, [data-testid="stAppViewContainer"] {
     background: transparent !important;
 }
 .stTabs [aria-selected="true"] {
-    background: """ + COLORS["primary_dim"] + """ !important;
-    color: """ + COLORS["primary_light"] + """ !important;
+    background: ${primary_dim} !important;
+    color: ${primary_light} !important;
 }
 
 /* ── DataFrames ── */
 [data-testid="stDataFrame"] {
-    border: 1px solid """ + COLORS["border"] + """;
+    border: 1px solid ${border};
     border-radius: 10px;
     overflow: hidden;
 }
 
 /* ── Expanders ── */
 [data-testid="stExpander"] {
-    border: 1px solid """ + COLORS["border"] + """ !important;
+    border: 1px solid ${border} !important;
     border-radius: 10px !important;
-    background: """ + COLORS["bg_surface"] + """ !important;
+    background: ${bg_surface} !important;
 }
 [data-testid="stExpander"] summary {
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-weight: 500 !important;
-    color: """ + COLORS["text_secondary"] + """ !important;
+    color: ${text_secondary} !important;
 }
 
 /* ── Buttons ── */
@@ -200,18 +235,18 @@ html, body, [data-testid="stAppViewContainer"] {
     border-radius: 8px !important;
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-weight: 600 !important;
-    border: 1px solid """ + COLORS["border"] + """ !important;
+    border: 1px solid ${border} !important;
     transition: all 0.2s ease !important;
 }
 .stButton > button:hover {
-    border-color: """ + COLORS["primary"] + """ !important;
-    color: """ + COLORS["primary_light"] + """ !important;
+    border-color: ${primary} !important;
+    color: ${primary_light} !important;
 }
 
 /* ── Dividers ── */
 [data-testid="stHorizontalBlock"] hr,
 hr {
-    border-color: """ + COLORS["border"] + """ !important;
+    border-color: ${border} !important;
     opacity: 0.5;
 }
 
@@ -221,19 +256,19 @@ hr {
     height: 6px;
 }
 ::-webkit-scrollbar-track {
-    background: """ + COLORS["bg_base"] + """;
+    background: ${bg_base};
 }
 ::-webkit-scrollbar-thumb {
-    background: """ + COLORS["border_light"] + """;
+    background: ${border_light};
     border-radius: 3px;
 }
 ::-webkit-scrollbar-thumb:hover {
-    background: """ + COLORS["text_muted"] + """;
+    background: ${text_muted};
 }
 
 /* ── Spinner ── */
 .stSpinner > div {
-    border-top-color: """ + COLORS["primary"] + """ !important;
+    border-top-color: ${primary} !important;
 }
 
 /* ── Section Header (custom) ── */
@@ -241,32 +276,32 @@ hr {
     margin-top: 1rem;
     margin-bottom: 0.75rem;
     padding-bottom: 0.5rem;
-    border-bottom: 2px solid """ + COLORS["primary_dim"] + """;
+    border-bottom: 2px solid ${primary_dim};
 }
 .section-hdr h2 {
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-weight: 700 !important;
     font-size: 1.25rem !important;
-    color: """ + COLORS["text_primary"] + """ !important;
+    color: ${text_primary} !important;
     margin: 0 !important;
     line-height: 1.3 !important;
 }
 .section-hdr .sub {
     font-size: 0.8rem;
-    color: """ + COLORS["text_muted"] + """;
+    color: ${text_muted};
     margin-top: 2px;
 }
 
 /* ── Warning Banner ── */
 .warn-banner {
-    background: """ + COLORS["warning_dim"] + """;
+    background: ${warning_dim};
     border: 1px solid rgba(245,158,11,0.3);
-    border-left: 3px solid """ + COLORS["warning"] + """;
+    border-left: 3px solid ${warning};
     border-radius: 8px;
     padding: 12px 16px;
     margin-bottom: 12px;
     font-size: 0.88rem;
-    color: """ + COLORS["text_primary"] + """;
+    color: ${text_primary};
     line-height: 1.5;
 }
 
@@ -278,7 +313,7 @@ hr {
     font-family: 'Plus Jakarta Sans', sans-serif !important;
     font-weight: 700 !important;
     font-size: 1.75rem !important;
-    color: """ + COLORS["text_primary"] + """ !important;
+    color: ${text_primary} !important;
     margin: 0 0 4px 0 !important;
 }
 .dash-header .meta {
@@ -286,12 +321,12 @@ hr {
     align-items: center;
     gap: 10px;
     font-size: 0.8rem;
-    color: """ + COLORS["text_muted"] + """;
+    color: ${text_muted};
 }
 .dash-header .badge {
     display: inline-block;
-    background: """ + COLORS["primary_dim"] + """;
-    color: """ + COLORS["primary_light"] + """;
+    background: ${primary_dim};
+    color: ${primary_light};
     font-weight: 600;
     font-size: 0.7rem;
     padding: 2px 8px;
@@ -305,8 +340,8 @@ hr {
     text-align: center;
     padding: 1.5rem 0 0.5rem 0;
     font-size: 0.75rem;
-    color: """ + COLORS["text_muted"] + """;
-    border-top: 1px solid """ + COLORS["border"] + """;
+    color: ${text_muted};
+    border-top: 1px solid ${border};
     margin-top: 1rem;
 }
 
@@ -320,9 +355,12 @@ hr {
     text-transform: uppercase;
     letter-spacing: 0.03em;
 }
-.st-badge.success { background: """ + COLORS["success_dim"] + """; color: """ + COLORS["success"] + """; }
-.st-badge.danger  { background: """ + COLORS["danger_dim"] + """; color: """ + COLORS["danger"] + """; }
-.st-badge.warning { background: """ + COLORS["warning_dim"] + """; color: """ + COLORS["warning"] + """; }
-.st-badge.info    { background: """ + COLORS["info_dim"] + """; color: """ + COLORS["info"] + """; }
+.st-badge.success { background: ${success_dim}; color: ${success}; }
+.st-badge.danger  { background: ${danger_dim}; color: ${danger}; }
+.st-badge.warning { background: ${warning_dim}; color: ${warning}; }
+.st-badge.info    { background: ${info_dim}; color: ${info}; }
 </style>
-"""
+""")
+
+# Substituição dos tokens de cor em uma única passada (import)
+CUSTOM_CSS = _CSS_TEMPLATE.substitute(COLORS)
@@ -3,8 +3,17 @@ Utilitários de cache para o dashboard.
 Fornece decoradores e helpers para evitar chamadas duplicadas à API.
 """
 
+import hashlib
+
 import streamlit as st
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 from dashboard.config import CACHE_TTL
+from dashboard.utils.json_utils import dumps
 
 
 def cached(ttl: int = CACHE_TTL):
@@ -15,3 +24,16 @@ def cached(ttl: int = CACHE_TTL):
 def clear_all_caches():
     """Limpa todos os caches do Streamlit."""
     st.cache_data.clear()
+
+
+def content_digest(obj) -> str:
+    """
+    Digest curto do conteúdo (JSON canônico) para usar como chave de cache.
+
+    Chaves pequenas evitam que o Streamlit percorra listas grandes de dicts
+    a cada rerun só para montar o hash dos argumentos.
+    """
+    blob = dumps(obj, sort_keys=True)
+    if xxhash:
+        return xxhash.xxh3_128_hexdigest(blob)
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
@@ -0,0 +1,27 @@
+"""
+Parsing de datas ISO dos payloads da API.
+As mesmas datas de vencimento/competência se repetem entre milhares de
+títulos: o parse é memoizado por string.
+"""
+
+import functools
+from datetime import date
+from typing import Optional
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_iso_cached(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10])
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_iso_date(value) -> Optional[date]:
+    """Converte 'AAAA-MM-DD...' em date; None se ausente ou inválida."""
+    if not value:
+        return None
+    try:
+        return _parse_iso_cached(value)
+    except TypeError:  # valor não-hashable (payload inesperado)
+        return None
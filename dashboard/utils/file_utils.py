@@ -0,0 +1,19 @@
+"""
+Escrita segura de arquivos locais (tokens/cache).
+"""
+
+import os
+
+
+def atomic_write(path: str, blob: bytes):
+    """Grava bytes via arquivo temporário + os.replace (nunca deixa arquivo pela metade)."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        # No Cloud (read-only filesystem), salva apenas em memória
+        pass
@@ -2,12 +2,32 @@
 Utilitários de formatação para valores financeiros brasileiros.
 """
 
+import numpy as np
+
 
 def format_brl(value: float) -> str:
     """Formata um número como Real brasileiro (R$ 150.000,50)."""
+    # Milhar com "_" (1_234.56 → 1.234,56): 2 replaces, sem marcador temporário
     if value >= 0:
-        return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"-R$ {abs(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return f"R$ {value:_.2f}".replace(".", ",").replace("_", ".")
+    return f"-R$ {abs(value):_.2f}".replace(".", ",").replace("_", ".")
+
+
+def format_brl_array(values) -> list[str]:
+    """
+    Formata uma sequência de valores (lista, Series, array) em lote.
+
+    Formata tudo numa única string e troca os separadores de uma vez
+    (1_234.56 → 1.234,56): 2 replaces no total em vez de 3 por valor.
+    """
+    floats = np.asarray(values, dtype=np.float64).tolist()
+    if not floats:
+        return []
+    blob = "|".join([
+        f"R$ {v:_.2f}" if v >= 0 else f"-R$ {-v:_.2f}"
+        for v in floats
+    ])
+    return blob.replace(".", ",").replace("_", ".").split("|")
 
 
 def format_percent(value: float, decimals: int = 1) -> str:
@@ -0,0 +1,36 @@
+"""
+(De)serialização JSON rápida.
+Usa orjson quando disponível, com fallback para o json da stdlib.
+"""
+
+import dataclasses
+import json
+from datetime import date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: bytes | str):
+    """Decodifica JSON a partir de bytes ou str."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(obj):
+    # Mesmo comportamento do orjson para dataclasses e datas (ISO 8601)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, date):  # inclui datetime
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, sort_keys: bool = False) -> bytes:
+    """Serializa para JSON em bytes (UTF-8); dataclasses viram objetos."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, default=_default).encode()